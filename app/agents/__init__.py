@@ -7,6 +7,9 @@ from app.agents.base import (
     AgentType,
     ExpressionType,
     ExpressionMode,
+    ExpressionState,
+    SceneType,
+    classify,
 )
 from app.agents.router import RouterAgent, AgentPrompt, RoutingDecision
 from app.agents.skin_agent import SkinEnhancementAgent
@@ -24,6 +27,9 @@ __all__ = [
     "AgentType",
     "ExpressionType",
     "ExpressionMode",
+    "ExpressionState",
+    "SceneType",
+    "classify",
     "RouterAgent",
     "AgentPrompt",
     "RoutingDecision",
@@ -1,9 +1,12 @@
 """Base class for enhancement agents."""
 
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional, TYPE_CHECKING
+from types import MappingProxyType
+from typing import Final, Mapping, Optional, Sequence, TYPE_CHECKING
 from enum import Enum
+from app.services.llm_client import get_llm_client
 
 if TYPE_CHECKING:
     from app.agents.router import AgentPrompt
@@ -29,13 +32,109 @@ class ExpressionType(str, Enum):
     OTHER = "other"
 
 
+class SceneType(str, Enum):
+    """Scene types the agents gate on (scene_type values from the classifier)."""
+    PORTRAIT = "portrait"
+    STREET = "street"
+    LANDSCAPE = "landscape"
+    OTHER = "other"
+
+
 class ExpressionMode(str, Enum):
     """Mode for expression handling."""
     PRESERVE = "preserve"  # Keep expression as-is
     CORRECT = "correct"    # Fix unnatural expression
 
 
-@dataclass
+# Chinese labels shared by agent descriptions and summaries
+INTENSITY_ZH: Final[Mapping[str, str]] = MappingProxyType({
+    "light": "轻微",
+    "medium": "中等",
+    "strong": "较强",
+})
+
+EXPRESSION_TYPE_ZH: Final[Mapping[str, str]] = MappingProxyType({
+    "big_laugh": "大笑",
+    "crying": "大哭",
+    "surprise": "惊讶",
+    "anger": "愤怒",
+    "neutral": "中性",
+    "other": "其他",
+})
+
+
+# Scenes with people in frame, where skin and expression work applies
+PORTRAIT_SCENES: Final[frozenset[SceneType]] = frozenset({
+    SceneType.PORTRAIT,
+    SceneType.STREET,
+    SceneType.OTHER,
+})
+
+
+# Agent classes by type, registered as agent subclasses are defined
+_AGENT_CLASSES: dict[AgentType, type["BaseEnhancementAgent"]] = {}
+
+# Keyword alternation per agent type, registered as agent subclasses are defined
+_KEYWORD_SOURCES: dict[AgentType, str] = {}
+_keyword_index_re: Optional[re.Pattern] = None
+
+
+def _keyword_index_pattern() -> re.Pattern:
+    """
+    Compile one pattern that reports every agent type matching a signal.
+    
+    Each agent gets its own optional lookahead group, so a single match at
+    position 0 tests all agents at once, including keywords that overlap
+    across agents (e.g. "光" and "光滑").
+    """
+    global _keyword_index_re
+    if _keyword_index_re is None:
+        _keyword_index_re = re.compile(
+            "".join(
+                f"(?=(?:.*?(?P<{agent_type.value}>{source}))?)"
+                for agent_type, source in _KEYWORD_SOURCES.items()
+            ),
+            re.DOTALL,
+        )
+    return _keyword_index_re
+
+
+def _index_signals(fake_signals: list) -> dict[AgentType, list]:
+    """Group fake signals by the agent types whose keywords they match."""
+    match = _keyword_index_pattern().match
+    hits: dict[AgentType, list] = {}
+    for signal in fake_signals:
+        for name, found in match(signal.signal.lower()).groupdict().items():
+            if found is not None:
+                hits.setdefault(AgentType(name), []).append(signal)
+    return hits
+
+
+@dataclass(frozen=True, slots=True)
+class ExpressionState:
+    """Expression analysis of the source image, shared by every iteration."""
+    type: str = "neutral"  # ExpressionType value
+    mode: ExpressionMode = ExpressionMode.PRESERVE
+    issues: tuple = ()  # Detected expression problems
+    natural: bool = True  # Whether expression appears natural
+    
+    @classmethod
+    def from_analysis(cls, analysis) -> "ExpressionState":
+        """Build the state from an ExpressionAnalysis, or neutral when there is none."""
+        if analysis is None:
+            return cls()
+        return cls(
+            type=analysis.expression_type,
+            mode=ExpressionMode.CORRECT if analysis.correction_needed else ExpressionMode.PRESERVE,
+            issues=tuple(analysis.expression_issues),
+            natural=analysis.expression_natural,
+        )
+
+
+_NEUTRAL_EXPRESSION = ExpressionState()
+
+
+@dataclass(slots=True)
 class EnhancementContext:
     """Context passed to enhancement agents."""
     image_base64: str
@@ -46,29 +145,84 @@ class EnhancementContext:
     previous_enhancements: list = field(default_factory=list)
     # Agent-specific prompt from router
     agent_prompt: Optional["AgentPrompt"] = None
-    # Expression-related fields
-    expression_type: str = "neutral"  # ExpressionType value
-    expression_mode: str = "preserve"  # ExpressionMode value
-    expression_issues: list = field(default_factory=list)  # List of detected expression problems
-    expression_natural: bool = True  # Whether expression appears natural
+    # Expression analysis, computed once per enhancement run
+    expression: ExpressionState = _NEUTRAL_EXPRESSION
+    # Keyword matches per agent type, built lazily by keyword_hits()
+    _keyword_hits: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    _keyword_hits_source: Optional[list] = field(default=None, init=False, repr=False, compare=False)
+    # scene_type as a SceneType, or None for scenes the agents don't gate on
+    scene: Optional[SceneType] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self.scene = SceneType._value2member_map_.get(self.scene_type.lower())
+    
+    def keyword_hits(self) -> dict[AgentType, list]:
+        """
+        Map each agent type to the fake signals matching its keywords.
+        
+        Computed once for all agents and rebuilt if fake_signals is reassigned.
+        """
+        if self._keyword_hits is None or self._keyword_hits_source is not self.fake_signals:
+            self._keyword_hits = _index_signals(self.fake_signals)
+            self._keyword_hits_source = self.fake_signals
+        return self._keyword_hits
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResult:
     """Result from an enhancement agent."""
     success: bool
     agent_type: AgentType
+    # None when the agent left the image unchanged; never included in to_dict()
     enhanced_image_base64: Optional[str] = None
     description: str = ""
-    changes_made: list = field(default_factory=list)
+    changes_made: Sequence[str] = ()  # May be a shared template tuple; don't mutate
     error_message: Optional[str] = None
     # Include the prompt that was used
     prompt_used: Optional[dict] = None
+    # Ran fine, but a concurrent agent's output was kept instead
+    superseded: bool = False
+    
+    @classmethod
+    def ok(
+        cls,
+        agent_type: AgentType,
+        description: str,
+        changes_made: Sequence[str],
+        prompt_used: Optional[dict] = None,
+        enhanced_image_base64: Optional[str] = None,
+    ) -> "AgentResult":
+        """Build a successful result."""
+        return cls(True, agent_type, enhanced_image_base64, description, changes_made, None, prompt_used)
+    
+    @classmethod
+    def fail(
+        cls,
+        agent_type: AgentType,
+        description: str,
+        error_message: str,
+        prompt_used: Optional[dict] = None,
+    ) -> "AgentResult":
+        """Build a failed result; the image is left unchanged."""
+        return cls(False, agent_type, None, description, (), error_message, prompt_used)
+    
+    def superseded_by(self, winner: AgentType) -> "AgentResult":
+        """This result with its edits dropped in favour of a concurrent agent's output."""
+        return AgentResult(
+            False,
+            self.agent_type,
+            None,
+            self.description,
+            (),
+            f"输出未采用：同级的{winner.value}专家结果优先",
+            self.prompt_used,
+            superseded=True,
+        )
     
     def to_dict(self) -> dict:
         return {
             "success": self.success,
-            "agent_type": self.agent_type.value,
+            "agent_type": self.agent_type,
             "description": self.description,
             "changes_made": self.changes_made,
             "error_message": self.error_message,
@@ -83,9 +237,42 @@ class BaseEnhancementAgent(ABC):
     Each agent specializes in fixing a specific type of AI artifact.
     """
     
+    __slots__ = ()
+    
     agent_type: AgentType = None
     
-    @abstractmethod
+    # Keywords that indicate issues this agent handles
+    KEYWORDS: list[str] = []
+    
+    # Scenes this agent applies to (None: any scene), and scenes it never applies to
+    SCENES: Optional[frozenset[SceneType]] = None
+    EXCLUDED_SCENES: frozenset[SceneType] = frozenset()
+    
+    def __init_subclass__(cls, **kwargs):
+        global _keyword_index_re
+        super().__init_subclass__(**kwargs)
+        if cls.agent_type is not None:
+            _AGENT_CLASSES[cls.agent_type] = cls
+        if cls.agent_type is not None and cls.KEYWORDS:
+            _KEYWORD_SOURCES[cls.agent_type] = "|".join(
+                re.escape(kw.lower()) for kw in cls.KEYWORDS
+            )
+            _keyword_index_re = None
+    
+    @classmethod
+    def handles(cls, context: EnhancementContext) -> bool:
+        """
+        Check whether this agent type applies to the context.
+        
+        The default gate is the agent's scene restrictions plus at least one
+        fake signal matching its KEYWORDS.
+        """
+        if context.scene in cls.EXCLUDED_SCENES:
+            return False
+        if cls.SCENES is not None and context.scene not in cls.SCENES:
+            return False
+        return cls.agent_type in context.keyword_hits()
+    
     async def can_handle(self, context: EnhancementContext) -> bool:
         """
         Check if this agent can handle the issues in the context.
@@ -96,7 +283,7 @@ class BaseEnhancementAgent(ABC):
         Returns:
             True if this agent should be invoked
         """
-        pass
+        return self.handles(context)
     
     @abstractmethod
     async def enhance(self, context: EnhancementContext) -> AgentResult:
@@ -111,26 +298,39 @@ class BaseEnhancementAgent(ABC):
         """
         pass
     
-    def _find_relevant_signals(self, context: EnhancementContext, keywords: list[str]) -> list:
+    @property
+    def llm_client(self):
+        """The process-wide LLM client shared by every agent."""
+        return get_llm_client()
+    
+    def _find_relevant_signals(self, context: EnhancementContext) -> list:
         """
-        Find fake signals that match any of the given keywords.
+        Find fake signals that match any of this agent's KEYWORDS.
         
         Args:
             context: The enhancement context
-            keywords: List of keywords to match against signal descriptions
             
         Returns:
             List of matching FakeSignal objects
         """
-        relevant = []
-        for signal in context.fake_signals:
-            signal_lower = signal.signal.lower()
-            if any(kw.lower() in signal_lower for kw in keywords):
-                relevant.append(signal)
-        return relevant
+        return context.keyword_hits().get(self.agent_type, [])
     
     def _get_prompt_dict(self, context: EnhancementContext) -> Optional[dict]:
         """Get the prompt as a dictionary for result reporting."""
         if context.agent_prompt:
             return context.agent_prompt.to_dict()
         return None
+
+
+def classify(context: EnhancementContext) -> set[AgentType]:
+    """
+    Find every agent type that can handle the context in one call.
+    
+    Keyword hits for all agents come from a single pass over the fake
+    signals; each agent class then only applies its own gates.
+    """
+    return {
+        agent_type
+        for agent_type, agent_cls in _AGENT_CLASSES.items()
+        if agent_cls.handles(context)
+    }
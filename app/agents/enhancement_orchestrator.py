@@ -1,9 +1,21 @@
 """Enhancement Orchestrator - Manages the iterative enhancement process."""
 
+import asyncio
+import hashlib
+from collections import Counter, OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional
-from app.agents.base import EnhancementContext, AgentResult, AgentType
-from app.agents.router import RouterAgent, RoutingDecision
+from types import MappingProxyType
+from typing import Final, Mapping, Optional
+from app.agents.base import (
+    EnhancementContext,
+    AgentResult,
+    AgentType,
+    ExpressionMode,
+    ExpressionState,
+    EXPRESSION_TYPE_ZH,
+    PORTRAIT_SCENES,
+)
+from app.agents.router import RouterAgent, RoutingDecision, AgentPrompt
 from app.pipeline.fake_detector import FakeSignalDetector, ExpressionAnalysis
 from app.pipeline.scene_classifier import SceneClassifier
 from app.models.schemas import FakeSignal
@@ -13,9 +25,24 @@ from app.models.schemas import FakeSignal
 MAX_ITERATIONS = 3
 AI_LIKELIHOOD_THRESHOLD = 0.4  # Target: below this is considered "realistic enough"
 IMPROVEMENT_THRESHOLD = 0.05   # Minimum improvement to continue iterating
+IMPROVEMENT_DECAY = 0.5        # Expected gain of the next iteration relative to the last one
+DETECT_CACHE_SIZE = 64         # Detection results kept per image digest
 
+# Summary translations
+_STOP_REASON_ZH: Final[Mapping[str, str]] = MappingProxyType({
+    "threshold_reached": "达到目标阈值",
+    "max_iterations": "达到最大迭代次数",
+    "no_improvement": "优化效果不明显",
+    "no_agents_needed": "无需专家处理",
+})
 
-@dataclass
+
+def _image_digest(image_base64: str) -> str:
+    """Content key for an image, used to reuse detection results."""
+    return hashlib.blake2b(image_base64.encode("ascii"), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
 class IterationResult:
     """Result of a single iteration."""
     iteration: int
@@ -26,20 +53,21 @@ class IterationResult:
     fake_signals_before: list
     fake_signals_after: list
     routing_decision: RoutingDecision
+    # Prompt per invoked agent, snapshotted once when the iteration ran
+    prompts_by_agent: dict[AgentType, Optional[AgentPrompt]] = field(default_factory=dict)
     
     def to_dict(self) -> dict:
-        # Extract agent prompts from routing decision
-        agent_prompts = []
-        for agent_type in self.agents_invoked:
-            prompt = self.routing_decision.get_prompt(agent_type)
-            if prompt:
-                agent_prompts.append(prompt.to_dict())
+        agent_prompts = [
+            prompt.to_dict()
+            for prompt in self.prompts_by_agent.values()
+            if prompt
+        ]
         
         return {
             "iteration": self.iteration,
             "ai_likelihood_before": self.ai_likelihood_before,
             "ai_likelihood_after": self.ai_likelihood_after,
-            "agents_invoked": [a.value for a in self.agents_invoked],
+            "agents_invoked": list(self.agents_invoked),
             "agent_results": [r.to_dict() for r in self.agent_results],
             "fake_signals_before_count": len(self.fake_signals_before),
             "fake_signals_after_count": len(self.fake_signals_after),
@@ -48,7 +76,7 @@ class IterationResult:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class EnhancementOrchestratorResult:
     """Final result from the enhancement orchestrator."""
     success: bool
@@ -61,6 +89,7 @@ class EnhancementOrchestratorResult:
     final_fake_signals: list = field(default_factory=list)
     summary: str = ""
     stopped_reason: str = ""  # "threshold_reached", "max_iterations", "no_improvement", "error"
+    early_stop_reason: str = ""  # "predicted_low_improvement", "repeated_routing" when stopped early
     # Expression analysis info
     expression_type: str = "neutral"
     expression_mode: str = "preserve"
@@ -76,6 +105,7 @@ class EnhancementOrchestratorResult:
             "final_fake_signals_count": len(self.final_fake_signals),
             "summary": self.summary,
             "stopped_reason": self.stopped_reason,
+            "early_stop_reason": self.early_stop_reason,
             "expression_type": self.expression_type,
             "expression_mode": self.expression_mode,
             "expression_issues": self.expression_issues,
@@ -89,7 +119,7 @@ class EnhancementOrchestrator:
     Flow:
     1. Detect AI signals in the image
     2. Route to appropriate expert agents
-    3. Execute experts sequentially
+    3. Execute experts (independent experts run concurrently)
     4. Re-detect AI likelihood
     5. If AI likelihood > threshold and iterations < max, go to step 2
     6. Return final result
@@ -99,6 +129,8 @@ class EnhancementOrchestrator:
         self.router = RouterAgent()
         self.fake_detector = FakeSignalDetector()
         self.scene_classifier = SceneClassifier()
+        # Image digest -> (ai_likelihood, fake_signals), least recently used first
+        self._detect_cache: OrderedDict[str, tuple[float, list[FakeSignal]]] = OrderedDict()
     
     async def enhance(
         self,
@@ -116,35 +148,33 @@ class EnhancementOrchestrator:
             scene_type: Type of scene (portrait, landscape, etc.)
             initial_ai_likelihood: Initial AI likelihood from scene classifier
             initial_fake_signals: Initially detected fake signals
-            expression_analysis: Optional pre-computed expression analysis
+            expression_analysis: Optional pre-computed expression analysis (e.g. from
+                FakeSignalDetector.analyze_full alongside initial_fake_signals)
             
         Returns:
             EnhancementOrchestratorResult with all iteration details
         """
         iterations = []
+        previous_enhancements = []
         current_image = image_base64
         current_ai_likelihood = initial_ai_likelihood
         current_fake_signals = initial_fake_signals
         stopped_reason = ""
+        early_stop_reason = ""
+        previous_routing_signature = None
+        previous_routing_signals = None
+        # Image that current_ai_likelihood/current_fake_signals were measured on
+        detected_image = image_base64
         
         # Detect expression if not provided (for portraits)
-        if expression_analysis is None and scene_type.lower() in ["portrait", "street", "other"]:
+        if expression_analysis is None and scene_type.lower() in PORTRAIT_SCENES:
             try:
                 expression_analysis = await self.fake_detector.detect_expression(image_base64)
             except Exception:
                 expression_analysis = ExpressionAnalysis()
         
-        # Default expression values
-        expression_type = "neutral"
-        expression_mode = "preserve"
-        expression_issues = []
-        expression_natural = True
-        
-        if expression_analysis:
-            expression_type = expression_analysis.expression_type
-            expression_natural = expression_analysis.expression_natural
-            expression_issues = expression_analysis.expression_issues
-            expression_mode = "correct" if expression_analysis.correction_needed else "preserve"
+        # Expression is analysed once and shared by every iteration's context
+        expression = ExpressionState.from_analysis(expression_analysis)
         
         # Check if enhancement is even needed
         if current_ai_likelihood < AI_LIKELIHOOD_THRESHOLD:
@@ -159,11 +189,15 @@ class EnhancementOrchestrator:
                 final_fake_signals=current_fake_signals,
                 summary="图像AI痕迹较低，无需增强处理",
                 stopped_reason="threshold_reached",
-                expression_type=expression_type,
-                expression_mode=expression_mode,
-                expression_issues=expression_issues,
+                expression_type=expression.type,
+                expression_mode=expression.mode,
+                expression_issues=list(expression.issues),
             )
         
+        # Hashing a multi-MB image would stall the event loop, so it runs in a worker
+        source_digest = await asyncio.to_thread(_image_digest, image_base64)
+        self._cache_detection(source_digest, initial_ai_likelihood, initial_fake_signals)
+        
         for iteration in range(MAX_ITERATIONS):
             # Create context for this iteration with expression info
             context = EnhancementContext(
@@ -172,11 +206,8 @@ class EnhancementOrchestrator:
                 ai_likelihood=current_ai_likelihood,
                 fake_signals=current_fake_signals,
                 iteration=iteration,
-                previous_enhancements=[r.to_dict() for it in iterations for r in it.agent_results],
-                expression_type=expression_type,
-                expression_mode=expression_mode,
-                expression_issues=expression_issues,
-                expression_natural=expression_natural,
+                previous_enhancements=list(previous_enhancements),
+                expression=expression,
             )
             
             # Step 1: Route to experts
@@ -186,39 +217,79 @@ class EnhancementOrchestrator:
                 stopped_reason = "no_agents_needed"
                 break
             
-            # Step 2: Execute experts sequentially
-            agent_results = []
-            ai_likelihood_before = current_ai_likelihood
+            # Resolve each agent's prompt once for execution, comparison and reporting
+            prompts_by_agent = {
+                agent_type: routing_decision.get_prompt(agent_type)
+                for agent_type in routing_decision.priority_order
+            }
             
-            for agent_type in routing_decision.priority_order:
-                agent = self.router.get_agent(agent_type)
-                if agent:
-                    # Update context with current image and agent-specific prompt
-                    context.image_base64 = current_image
-                    context.agent_prompt = routing_decision.get_prompt(agent_type)
-                    
-                    # Execute agent
-                    result = await agent.enhance(context)
-                    agent_results.append(result)
-                    
-                    # Update current image if successful
-                    if result.success and result.enhanced_image_base64:
-                        current_image = result.enhanced_image_base64
+            # The same plan on the same signals would repeat the previous iteration
+            routing_signature = self._routing_signature(prompts_by_agent)
+            if (
+                routing_signature == previous_routing_signature
+                and current_fake_signals == previous_routing_signals
+            ):
+                stopped_reason = "no_improvement"
+                early_stop_reason = "repeated_routing"
+                break
+            previous_routing_signature = routing_signature
+            previous_routing_signals = current_fake_signals
+            
+            # Step 2: Execute experts level by level
+            ai_likelihood_before = current_ai_likelihood
+            agent_results, current_image = await self.router.execute_plan(
+                routing_decision, context, prompts_by_agent
+            )
             
             # Step 3: Re-detect AI likelihood
             fake_signals_before = current_fake_signals
             
-            try:
-                # Re-classify to get new AI likelihood
-                new_classification = await self.scene_classifier.classify(current_image)
-                new_ai_likelihood = new_classification.ai_likelihood
+            # The router reads the expression state, so it can't overlap with
+            # routing; refresh it alongside re-detection once the expression
+            # expert has actually changed a face that needed correcting. A
+            # preserved expression has nothing left to re-check
+            refresh_expression = expression.mode is ExpressionMode.CORRECT and any(
+                r.agent_type is AgentType.EXPRESSION and r.success and r.enhanced_image_base64
+                for r in agent_results
+            )
+            
+            # Until a new measurement succeeds, the current detection stands
+            new_ai_likelihood = current_ai_likelihood
+            new_fake_signals = current_fake_signals
+            
+            # Nothing to re-detect when no expert changed the image (all
+            # failed or were no-ops)
+            if current_image is not detected_image:
+                # An image that was already analyzed reuses its detection
+                image_digest = await asyncio.to_thread(_image_digest, current_image)
+                cached_detection = None if refresh_expression else self._detect_cache.get(image_digest)
                 
-                # Re-detect fake signals
-                new_fake_signals = await self.fake_detector.detect(current_image)
-            except Exception:
-                # If re-detection fails, use previous values
-                new_ai_likelihood = current_ai_likelihood
-                new_fake_signals = current_fake_signals
+                if cached_detection is not None:
+                    self._detect_cache.move_to_end(image_digest)
+                    new_ai_likelihood, new_fake_signals = cached_detection
+                    detected_image = current_image
+                else:
+                    try:
+                        # Re-classify and re-detect fake signals in one round trip;
+                        # a changed face is re-analysed by the same vision call
+                        if refresh_expression:
+                            new_classification, (new_fake_signals, new_expression) = await asyncio.gather(
+                                self.scene_classifier.classify(current_image),
+                                self.fake_detector.analyze_full(current_image),
+                            )
+                            expression = ExpressionState.from_analysis(new_expression)
+                        else:
+                            new_classification, new_fake_signals = await asyncio.gather(
+                                self.scene_classifier.classify(current_image),
+                                self.fake_detector.detect(current_image),
+                            )
+                        new_ai_likelihood = new_classification.ai_likelihood
+                        self._cache_detection(image_digest, new_ai_likelihood, new_fake_signals)
+                        detected_image = current_image
+                    except Exception:
+                        # If re-detection fails, keep the previous values
+                        new_ai_likelihood = current_ai_likelihood
+                        new_fake_signals = current_fake_signals
             
             # Record iteration
             iteration_result = IterationResult(
@@ -230,8 +301,10 @@ class EnhancementOrchestrator:
                 fake_signals_before=fake_signals_before,
                 fake_signals_after=new_fake_signals,
                 routing_decision=routing_decision,
+                prompts_by_agent=prompts_by_agent,
             )
             iterations.append(iteration_result)
+            previous_enhancements.extend(r.to_dict() for r in agent_results)
             
             # Update state for next iteration
             previous_ai_likelihood = current_ai_likelihood
@@ -248,6 +321,17 @@ class EnhancementOrchestrator:
             if improvement < IMPROVEMENT_THRESHOLD:
                 stopped_reason = "no_improvement"
                 break
+            
+            # Gains shrink from one round to the next, so an iteration that
+            # improved by less than IMPROVEMENT_THRESHOLD / IMPROVEMENT_DECAY
+            # predicts a next round that wouldn't clear the threshold; skip it
+            if (
+                iteration + 1 < MAX_ITERATIONS
+                and improvement * IMPROVEMENT_DECAY < IMPROVEMENT_THRESHOLD
+            ):
+                stopped_reason = "no_improvement"
+                early_stop_reason = "predicted_low_improvement"
+                break
         else:
             stopped_reason = "max_iterations"
         
@@ -257,8 +341,8 @@ class EnhancementOrchestrator:
             initial_ai_likelihood,
             current_ai_likelihood,
             stopped_reason,
-            expression_type,
-            expression_mode,
+            expression.type,
+            expression.mode,
         )
         
         return EnhancementOrchestratorResult(
@@ -272,9 +356,34 @@ class EnhancementOrchestrator:
             final_fake_signals=current_fake_signals,
             summary=summary,
             stopped_reason=stopped_reason,
-            expression_type=expression_type,
-            expression_mode=expression_mode,
-            expression_issues=expression_issues,
+            early_stop_reason=early_stop_reason,
+            expression_type=expression.type,
+            expression_mode=expression.mode,
+            expression_issues=list(expression.issues),
+        )
+    
+    def _cache_detection(
+        self,
+        image_digest: str,
+        ai_likelihood: float,
+        fake_signals: list[FakeSignal],
+    ) -> None:
+        """Store a detection result, evicting the least recently used entry."""
+        self._detect_cache[image_digest] = (ai_likelihood, fake_signals)
+        self._detect_cache.move_to_end(image_digest)
+        if len(self._detect_cache) > DETECT_CACHE_SIZE:
+            self._detect_cache.popitem(last=False)
+    
+    @staticmethod
+    def _routing_signature(prompts_by_agent: dict[AgentType, Optional[AgentPrompt]]) -> tuple:
+        """Summarize a routing decision as agent order plus per-agent intensity and areas."""
+        return (
+            tuple(prompts_by_agent),
+            tuple(
+                (p.intensity, tuple(p.target_areas))
+                for p in prompts_by_agent.values()
+                if p is not None
+            ),
         )
     
     def _generate_summary(
@@ -290,38 +399,22 @@ class EnhancementOrchestrator:
         if not iterations:
             return "未执行增强处理"
         
-        # Count all agents invoked
-        all_agents = []
-        for it in iterations:
-            all_agents.extend(it.agents_invoked)
-        
-        agent_counts = {}
-        for agent in all_agents:
-            agent_counts[agent.value] = agent_counts.get(agent.value, 0) + 1
+        # Count the agents invoked, leaving out those whose edits were superseded
+        agent_counts = Counter(
+            r.agent_type for it in iterations for r in it.agent_results if not r.superseded
+        )
         
-        agent_summary = ", ".join([
-            f"{name}({count}次)" for name, count in agent_counts.items()
-        ])
+        agent_summary = ", ".join(
+            f"{agent.value}({count}次)" for agent, count in agent_counts.items()
+        )
         
         improvement = initial_likelihood - final_likelihood
         improvement_pct = improvement * 100
         
-        reason_text = {
-            "threshold_reached": "达到目标阈值",
-            "max_iterations": "达到最大迭代次数",
-            "no_improvement": "优化效果不明显",
-            "no_agents_needed": "无需专家处理",
-        }.get(stopped_reason, stopped_reason)
+        reason_text = _STOP_REASON_ZH.get(stopped_reason, stopped_reason)
         
         # Expression info
-        expression_type_zh = {
-            "big_laugh": "大笑",
-            "crying": "大哭",
-            "surprise": "惊讶",
-            "anger": "愤怒",
-            "neutral": "中性",
-            "other": "其他",
-        }.get(expression_type, expression_type)
+        expression_type_zh = EXPRESSION_TYPE_ZH.get(expression_type, expression_type)
         
         expression_mode_zh = "保留" if expression_mode == "preserve" else "修正"
         
@@ -1,9 +1,25 @@
 """Expression Enhancement Agent - Specializes in fixing facial expression muscle issues."""
 
-from app.agents.base import BaseEnhancementAgent, EnhancementContext, AgentResult, AgentType
-from app.services.llm_client import get_llm_client
+from types import MappingProxyType
+from typing import Mapping
+from app.agents.base import (
+    BaseEnhancementAgent,
+    EnhancementContext,
+    AgentResult,
+    AgentType,
+    ExpressionMode,
+    INTENSITY_ZH,
+    PORTRAIT_SCENES,
+    EXPRESSION_TYPE_ZH,
+)
 
 
+# Identity and scene details every expression correction must keep
+_DEFAULT_PRESERVATION = (
+    "maintain overall face shape and identity, preserve hair style, "
+    "keep same clothing and background, maintain skin tone"
+)
+
 # Expression correction templates with professional muscle guidance
 EXPRESSION_CORRECTION_TEMPLATES = {
     "big_laugh": {
@@ -21,10 +37,7 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "missing crow's feet, perfectly symmetrical smile, "
             "unnatural teeth alignment, plastic expression, stiff smile"
         ),
-        "preservation": (
-            "maintain overall face shape and identity, preserve hair style, "
-            "keep same clothing and background, maintain skin tone"
-        ),
+        "preservation": _DEFAULT_PRESERVATION,
         "muscles": [
             "orbicularis_oculi",
             "zygomatic_major",
@@ -32,13 +45,13 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "levator_labii",
             "mentalis",
         ],
-        "instructions_zh": [
+        "instructions_zh": (
             "添加眼角鱼尾纹（眼轮匝肌收缩效果）",
             "增强颧骨处苹果肌隆起",
             "加深鼻唇沟并调整走向",
             "修正牙齿暴露的自然度",
             "添加下巴轻微颏肌纹理",
-        ],
+        ),
     },
     "crying": {
         "positive": (
@@ -55,10 +68,7 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "smooth chin without texture, perfectly shaped tears, "
             "symmetrical crying face, plastic sadness, stiff mouth"
         ),
-        "preservation": (
-            "maintain overall face shape and identity, preserve hair style, "
-            "keep same clothing and background, maintain skin tone"
-        ),
+        "preservation": _DEFAULT_PRESERVATION,
         "muscles": [
             "corrugator",
             "depressor_anguli_oris",
@@ -66,13 +76,13 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "orbicularis_oris",
             "procerus",
         ],
-        "instructions_zh": [
+        "instructions_zh": (
             "添加眉间川字纹（皱眉肌收缩）",
             "增加眼眶红肿感",
             "添加鼻尖发红效果",
             "修正嘴角下拉的自然度",
             "添加下巴橘皮纹理（颏肌收缩）",
-        ],
+        ),
     },
     "surprise": {
         "positive": (
@@ -87,20 +97,17 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "too symmetrical surprise, stiff expression, "
             "unnatural eyebrow shape"
         ),
-        "preservation": (
-            "maintain overall face shape and identity, preserve hair style, "
-            "keep same clothing and background, maintain skin tone"
-        ),
+        "preservation": _DEFAULT_PRESERVATION,
         "muscles": [
             "frontalis",
             "levator_palpebrae",
         ],
-        "instructions_zh": [
+        "instructions_zh": (
             "添加额头横纹（额肌收缩）",
             "调整眉毛弧度",
             "修正眼睛睁大的自然度",
             "调整嘴型为自然椭圆",
-        ],
+        ),
     },
     "anger": {
         "positive": (
@@ -116,10 +123,7 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "wide open eyes while angry, smooth forehead, "
             "stiff expression, fake anger"
         ),
-        "preservation": (
-            "maintain overall face shape and identity, preserve hair style, "
-            "keep same clothing and background, maintain skin tone"
-        ),
+        "preservation": _DEFAULT_PRESERVATION,
         "muscles": [
             "corrugator",
             "procerus",
@@ -127,15 +131,24 @@ EXPRESSION_CORRECTION_TEMPLATES = {
             "masseter",
             "orbicularis_oris",
         ],
-        "instructions_zh": [
+        "instructions_zh": (
             "加深眉间川字纹",
             "调整鼻翼外张效果",
             "增强咬肌紧张感",
             "修正眼睛瞪视效果",
-        ],
+        ),
     },
 }
 
+# Per-field views of the templates, keyed directly by expression type
+_POSITIVE_BY_TYPE = {k: v["positive"] for k, v in EXPRESSION_CORRECTION_TEMPLATES.items()}
+_NEGATIVE_BY_TYPE = {k: v["negative"] for k, v in EXPRESSION_CORRECTION_TEMPLATES.items()}
+_PRESERVATION_BY_TYPE = {k: v["preservation"] for k, v in EXPRESSION_CORRECTION_TEMPLATES.items()}
+_INSTRUCTIONS_ZH_BY_TYPE = {k: v["instructions_zh"] for k, v in EXPRESSION_CORRECTION_TEMPLATES.items()}
+
+# Shared read-only result for unknown expression types
+_NO_TEMPLATE: Mapping = MappingProxyType({})
+
 
 class ExpressionEnhancementAgent(BaseEnhancementAgent):
     """
@@ -149,9 +162,13 @@ class ExpressionEnhancementAgent(BaseEnhancementAgent):
     """
     
     agent_type = AgentType.EXPRESSION
+    __slots__ = ()
+    
+    # Only applicable for portraits
+    SCENES = PORTRAIT_SCENES
     
     # Keywords that indicate expression-related issues
-    EXPRESSION_KEYWORDS = [
+    KEYWORDS = [
         # Laugh related
         "laugh", "笑", "smile", "微笑", "grin", "teeth", "牙",
         "crow's feet", "鱼尾纹", "cheek", "脸颊", "苹果肌",
@@ -166,54 +183,47 @@ class ExpressionEnhancementAgent(BaseEnhancementAgent):
         "muscle", "肌肉", "asymmetr", "对称", "fake", "假",
     ]
     
-    def __init__(self):
-        self.llm_client = get_llm_client()
-    
-    async def can_handle(self, context: EnhancementContext) -> bool:
+    @classmethod
+    def handles(cls, context: EnhancementContext) -> bool:
         """Check if there are expression-related issues to fix."""
-        # Only applicable for portraits
-        if context.scene_type.lower() not in ["portrait", "street", "other"]:
+        if context.scene not in cls.SCENES:
             return False
         
+        # The router already dispatched this agent
+        prompt = context.agent_prompt
+        if prompt is not None and prompt.agent_type is cls.agent_type:
+            return True
+        
         # Check if expression mode is "correct"
-        if context.expression_mode == "correct":
+        if context.expression.mode is ExpressionMode.CORRECT:
             return True
         
         # Check for expression-related signals
-        relevant_signals = self._find_relevant_signals(context, self.EXPRESSION_KEYWORDS)
-        return len(relevant_signals) > 0
+        return super().handles(context)
     
     async def enhance(self, context: EnhancementContext) -> AgentResult:
         """Execute expression enhancement based on the provided prompt."""
+        agent_type = self.agent_type
+        prompt_dict = self._get_prompt_dict(context)
+        
         try:
             prompt = context.agent_prompt
-            prompt_dict = self._get_prompt_dict(context)
             
             # Get expression type from context or prompt
-            expression_type = context.expression_type
+            expression_type = context.expression.type
             if prompt and prompt.expression_type:
                 expression_type = prompt.expression_type
             
-            # Get correction template
-            template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type)
+            # Get default instructions for this expression type
+            template_instructions = _INSTRUCTIONS_ZH_BY_TYPE.get(expression_type)
             
             if prompt and prompt.correction_prompt:
                 # Use the specific correction from router
-                changes_made = prompt.specific_instructions.copy() if prompt.specific_instructions else []
+                changes_made = prompt.specific_instructions or []
                 
-                intensity_desc = {
-                    "light": "轻微",
-                    "medium": "中等",
-                    "strong": "较强"
-                }.get(prompt.intensity, "中等")
+                intensity_desc = INTENSITY_ZH.get(prompt.intensity, "中等")
                 
-                expression_type_zh = {
-                    "big_laugh": "大笑",
-                    "crying": "大哭",
-                    "surprise": "惊讶",
-                    "anger": "愤怒",
-                    "neutral": "中性",
-                }.get(expression_type, expression_type)
+                expression_type_zh = EXPRESSION_TYPE_ZH.get(expression_type, expression_type)
                 
                 description = (
                     f"表情肌肉修正 ({intensity_desc}强度) - "
@@ -221,9 +231,9 @@ class ExpressionEnhancementAgent(BaseEnhancementAgent):
                     f"模式: {'修正' if prompt.expression_mode == 'correct' else '保留'}"
                 )
                 
-            elif template:
+            elif template_instructions:
                 # Use default template
-                changes_made = template["instructions_zh"].copy()
+                changes_made = template_instructions
                 description = f"表情肌肉修正 - 使用{expression_type}默认模板"
                 
             else:
@@ -231,46 +241,32 @@ class ExpressionEnhancementAgent(BaseEnhancementAgent):
                 changes_made = ["修正表情自然度"]
                 description = "表情优化 - 使用通用设置"
             
-            return AgentResult(
-                success=True,
-                agent_type=self.agent_type,
-                enhanced_image_base64=context.image_base64,  # Would be modified in real impl
-                description=description,
-                changes_made=changes_made,
-                error_message=None,
-                prompt_used=prompt_dict,
-            )
+            return AgentResult.ok(agent_type, description, changes_made, prompt_dict)
             
         except Exception as e:
-            return AgentResult(
-                success=False,
-                agent_type=self.agent_type,
-                enhanced_image_base64=context.image_base64,
-                description="表情修正失败",
-                error_message=str(e),
-                prompt_used=self._get_prompt_dict(context),
-            )
+            return AgentResult.fail(agent_type, "表情修正失败", str(e), prompt_dict)
     
     @staticmethod
-    def get_correction_template(expression_type: str) -> dict:
-        """Get the correction template for an expression type."""
-        return EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, {})
+    def get_correction_template(expression_type: str) -> Mapping:
+        """Get the correction template for an expression type (empty if unknown)."""
+        return EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, _NO_TEMPLATE)
     
     @staticmethod
     def get_preservation_prompt(expression_type: str) -> str:
         """Get the preservation prompt for an expression type."""
-        template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, {})
-        return template.get("preservation", 
+        return _PRESERVATION_BY_TYPE.get(expression_type,
             "maintain overall face shape and identity, preserve hair style")
     
     @staticmethod
     def get_correction_prompt(expression_type: str) -> str:
         """Get the correction prompt for an expression type."""
-        template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, {})
-        return template.get("positive", "")
+        return _POSITIVE_BY_TYPE.get(expression_type, "")
     
     @staticmethod
     def get_negative_prompt(expression_type: str) -> str:
         """Get the negative prompt for an expression type."""
-        template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, {})
-        return template.get("negative", "fake expression, stiff, unnatural")
+        return _NEGATIVE_BY_TYPE.get(expression_type, "fake expression, stiff, unnatural")
+
+
+# Agents are stateless, so one shared instance serves every request
+expression_enhancement_agent = ExpressionEnhancementAgent()
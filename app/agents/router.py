@@ -1,40 +1,84 @@
 """Router Agent - Decides which expert agents to invoke and generates specific prompts."""
 
-from dataclasses import dataclass, field
+import asyncio
+import hashlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Final, Mapping, Optional, Sequence
 from app.agents.base import (
     BaseEnhancementAgent,
     EnhancementContext,
+    AgentResult,
     AgentType,
+    ExpressionMode,
+    classify,
 )
-from app.agents.skin_agent import SkinEnhancementAgent
-from app.agents.lighting_agent import LightingEnhancementAgent
-from app.agents.texture_agent import TextureEnhancementAgent
-from app.agents.geometry_agent import GeometryEnhancementAgent
-from app.agents.color_agent import ColorEnhancementAgent
-from app.agents.expression_agent import ExpressionEnhancementAgent, EXPRESSION_CORRECTION_TEMPLATES
+from app.agents.skin_agent import skin_enhancement_agent
+from app.agents.lighting_agent import lighting_enhancement_agent
+from app.agents.texture_agent import texture_enhancement_agent
+from app.agents.geometry_agent import geometry_enhancement_agent
+from app.agents.color_agent import color_enhancement_agent
+from app.agents.expression_agent import expression_enhancement_agent, EXPRESSION_CORRECTION_TEMPLATES
 from app.services.llm_client import get_llm_client
 
 
-@dataclass
+# Agents that reshape the face must see each other's output, so they run one at
+# a time; the remaining experts only touch surface appearance and run concurrently.
+SEQUENTIAL_AGENTS = frozenset({AgentType.EXPRESSION, AgentType.GEOMETRY})
+
+# Shared expert instances; every router reads from the same registry
+_AGENT_REGISTRY: Final[Mapping[AgentType, BaseEnhancementAgent]] = MappingProxyType({
+    AgentType.SKIN: skin_enhancement_agent,
+    AgentType.LIGHTING: lighting_enhancement_agent,
+    AgentType.TEXTURE: texture_enhancement_agent,
+    AgentType.GEOMETRY: geometry_enhancement_agent,
+    AgentType.COLOR: color_enhancement_agent,
+    AgentType.EXPRESSION: expression_enhancement_agent,
+})
+
+# Lowercase agent name -> AgentType, for parsing LLM output without exceptions
+_AGENT_TYPE_BY_NAME: Final[Mapping[str, AgentType]] = MappingProxyType({t.value: t for t in AgentType})
+
+ROUTE_CACHE_SIZE = 512  # Max routing decisions kept in the LRU cache
+# Only cuts off output, so a lower cap saves no time on plans that fit; a plan
+# for every agent runs well past 1024 tokens and would be truncated unparseable
+ROUTE_MAX_TOKENS = 2048
+ROUTE_RESPONSE_FORMAT = {"type": "json_object"}  # Passed to the SDK as-is, so a plain dict
+HEURISTIC_MAX_AI_LIKELIHOOD = 0.5  # Below this, keyword routing skips the LLM
+MAX_CONCURRENT_AGENTS = 4  # Cap on concurrent expert calls to the upstream model
+
+
+def _normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace for cache-key comparison."""
+    return " ".join(text.lower().split())
+
+
+@dataclass(slots=True)
 class AgentPrompt:
     """Structured prompt for an expert agent."""
     agent_type: AgentType
     positive_prompt: str  # What to add/enhance
     negative_prompt: str  # What to avoid/remove
     intensity: str  # "light", "medium", "strong"
-    specific_instructions: list[str] = field(default_factory=list)
-    target_areas: list[str] = field(default_factory=list)
+    specific_instructions: Sequence[str] = ()
+    target_areas: Sequence[str] = ()
     # New fields for preservation/correction
     preservation_prompt: str = ""  # What to preserve (identity, pose, etc.)
     correction_prompt: str = ""  # What to correct (expression muscles, etc.)
     denoising_strength: float = 0.2  # Suggested denoising strength
     expression_mode: str = "preserve"  # "preserve" or "correct"
     expression_type: str = "neutral"  # Type of expression detected
-    expression_issues: list[str] = field(default_factory=list)  # Specific expression problems
+    expression_issues: Sequence[str] = ()  # Specific expression problems
+    # Target areas joined for agent descriptions ("全局" when empty)
+    target_areas_text: str = field(default="", init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self.target_areas_text = ", ".join(self.target_areas) if self.target_areas else "全局"
     
     def to_dict(self) -> dict:
         return {
-            "agent_type": self.agent_type.value,
+            "agent_type": self.agent_type,
             "positive_prompt": self.positive_prompt,
             "negative_prompt": self.negative_prompt,
             "intensity": self.intensity,
@@ -49,7 +93,7 @@ class AgentPrompt:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingDecision:
     """Decision made by the router agent."""
     agents_to_invoke: list[AgentType]
@@ -60,21 +104,33 @@ class RoutingDecision:
     def get_prompt(self, agent_type: AgentType) -> AgentPrompt:
         """Get the prompt for a specific agent."""
         return self.agent_prompts.get(agent_type)
+    
+    def execution_levels(self) -> list[list[AgentType]]:
+        """
+        Group the priority order into levels that can be executed concurrently.
+        
+        Each sequential agent forms its own level; consecutive independent
+        agents are batched into a shared level. Level order follows priority_order.
+        """
+        levels = []
+        batch = []
+        for agent_type in self.priority_order:
+            if agent_type in SEQUENTIAL_AGENTS:
+                if batch:
+                    levels.append(batch)
+                    batch = []
+                levels.append([agent_type])
+            else:
+                batch.append(agent_type)
+        if batch:
+            levels.append(batch)
+        return levels
 
 
-ROUTING_PROMPT = """你是一个图像增强路由专家。根据检测到的AI痕迹和表情分析结果，决定应该调用哪些专家Agent来修复图像，并为每个专家生成具体的修图指令。
-
-图像类型: {scene_type}
-AI生成可能性: {ai_likelihood:.0%}
-
-检测到的问题：
-{signals}
-
-表情分析：
-- 表情类型: {expression_type}
-- 表情是否自然: {expression_natural}
-- 表情模式: {expression_mode}
-{expression_issues}
+# Static instructions go in the system message so the prefix is identical on
+# every call and can be served from the provider's prompt cache; only the
+# short per-image block below varies.
+ROUTING_SYSTEM_PROMPT = """你是一个图像增强路由专家。根据用户提供的图像信息、检测到的AI痕迹和表情分析结果，决定应该调用哪些专家Agent来修复图像，并为每个专家生成具体的修图指令。
 
 可用的专家Agent：
 1. SKIN - 皮肤专家：处理皮肤过于光滑、缺乏毛孔、塑料感等问题
@@ -107,12 +163,12 @@ AI生成可能性: {ai_likelihood:.0%}
 - 表情修正时，建议使用0.25-0.35
 
 返回JSON格式：
-{{
+{
   "agents_to_invoke": ["EXPRESSION", "SKIN"],
   "reasoning": "选择理由的简短说明",
   "priority_order": ["EXPRESSION", "SKIN"],
-  "agent_prompts": {{
-    "EXPRESSION": {{
+  "agent_prompts": {
+    "EXPRESSION": {
       "preservation_prompt": "maintain overall face shape and identity, preserve hair style",
       "correction_prompt": "Duchenne smile with crow's feet at eye corners, raised apple cheeks, deepened nasolabial folds",
       "positive_prompt": "natural smile with proper muscle engagement, eye squint from orbicularis oculi",
@@ -124,8 +180,8 @@ AI生成可能性: {ai_likelihood:.0%}
       "expression_issues": ["眼睛没有眯起", "缺少鱼尾纹", "苹果肌不明显"],
       "specific_instructions": ["添加眼角鱼尾纹", "增强颧骨苹果肌", "加深鼻唇沟"],
       "target_areas": ["eyes", "cheeks", "mouth"]
-    }},
-    "SKIN": {{
+    },
+    "SKIN": {
       "preservation_prompt": "preserve corrected facial expression, maintain identity",
       "correction_prompt": "",
       "positive_prompt": "add subtle skin pores, natural skin texture",
@@ -137,9 +193,9 @@ AI生成可能性: {ai_likelihood:.0%}
       "expression_issues": [],
       "specific_instructions": ["添加轻微毛孔纹理"],
       "target_areas": ["face"]
-    }}
-  }}
-}}
+    }
+  }
+}
 
 注意：
 - 只为选中的专家生成提示词
@@ -152,6 +208,83 @@ AI生成可能性: {ai_likelihood:.0%}
 
 只返回JSON，不要其他内容。"""
 
+ROUTING_USER_TEMPLATE = """图像类型: {scene_type}
+AI生成可能性: {ai_likelihood:.0%}
+
+检测到的问题：
+{signals}
+
+表情分析：
+- 表情类型: {expression_type}
+- 表情是否自然: {expression_natural}
+- 表情模式: {expression_mode}
+{expression_issues}"""
+
+
+# Default prompts used when the LLM gives none; expression fields are filled per call
+_BASE_PRESERVATION = "maintain overall face shape and identity, preserve hair style"
+_EXPRESSION_PRESERVATION = _BASE_PRESERVATION + ", preserve exact facial expression"
+_EXPRESSION_PRESERVE_NEGATIVE = ", altered expression, different emotion, changed pose"
+
+_DEFAULT_PROMPT_TEMPLATES: Final[Mapping[AgentType, AgentPrompt]] = MappingProxyType({
+    AgentType.SKIN: AgentPrompt(
+        agent_type=AgentType.SKIN,
+        positive_prompt="natural skin texture, visible pores, subtle imperfections, realistic skin detail",
+        negative_prompt="plastic skin, airbrushed, overly smooth, waxy, artificial",
+        intensity="medium",
+        specific_instructions=("添加自然的皮肤纹理", "增加毛孔细节"),
+        target_areas=("face", "skin areas"),
+        preservation_prompt=_BASE_PRESERVATION,
+        denoising_strength=0.18,
+    ),
+    AgentType.LIGHTING: AgentPrompt(
+        agent_type=AgentType.LIGHTING,
+        positive_prompt="natural lighting, consistent shadows, soft light falloff, realistic highlights",
+        negative_prompt="harsh lighting, inconsistent shadows, artificial highlights, flat lighting",
+        intensity="medium",
+        specific_instructions=("统一光源方向", "柔化阴影边缘"),
+        target_areas=("global",),
+        preservation_prompt=_BASE_PRESERVATION,
+        denoising_strength=0.18,
+    ),
+    AgentType.TEXTURE: AgentPrompt(
+        agent_type=AgentType.TEXTURE,
+        positive_prompt="detailed texture, natural surface variation, micro details, material authenticity",
+        negative_prompt="uniform texture, repetitive patterns, overly clean surfaces, artificial smoothness",
+        intensity="medium",
+        specific_instructions=("增加表面细节", "添加自然磨损感"),
+        target_areas=("surfaces", "materials"),
+        preservation_prompt=_BASE_PRESERVATION,
+        denoising_strength=0.18,
+    ),
+    AgentType.GEOMETRY: AgentPrompt(
+        agent_type=AgentType.GEOMETRY,
+        positive_prompt="correct anatomy, natural proportions, proper perspective, realistic pose",
+        negative_prompt="distorted anatomy, extra fingers, wrong proportions, impossible geometry",
+        intensity="medium",
+        specific_instructions=("修正解剖学错误", "调整比例"),
+        target_areas=("body", "hands", "face"),
+        preservation_prompt=_BASE_PRESERVATION,
+        denoising_strength=0.20,
+    ),
+    AgentType.COLOR: AgentPrompt(
+        agent_type=AgentType.COLOR,
+        positive_prompt="natural colors, balanced saturation, consistent color temperature, realistic tones",
+        negative_prompt="oversaturated, HDR look, artificial colors, inconsistent temperature",
+        intensity="medium",
+        specific_instructions=("降低过度饱和", "统一色温"),
+        target_areas=("global",),
+        preservation_prompt=_BASE_PRESERVATION,
+        denoising_strength=0.15,
+    ),
+})
+
+# Negative prompts with the expression-preserving suffix, shared by every call
+_EXPRESSION_PRESERVE_NEGATIVES: Final[Mapping[AgentType, str]] = MappingProxyType({
+    agent_type: template.negative_prompt + _EXPRESSION_PRESERVE_NEGATIVE
+    for agent_type, template in _DEFAULT_PROMPT_TEMPLATES.items()
+})
+
 
 class RouterAgent:
     """
@@ -162,15 +295,17 @@ class RouterAgent:
     def __init__(self):
         self.llm_client = get_llm_client()
         
-        # Initialize all available expert agents
-        self.available_agents: dict[AgentType, BaseEnhancementAgent] = {
-            AgentType.SKIN: SkinEnhancementAgent(),
-            AgentType.LIGHTING: LightingEnhancementAgent(),
-            AgentType.TEXTURE: TextureEnhancementAgent(),
-            AgentType.GEOMETRY: GeometryEnhancementAgent(),
-            AgentType.COLOR: ColorEnhancementAgent(),
-            AgentType.EXPRESSION: ExpressionEnhancementAgent(),
-        }
+        self.available_agents = _AGENT_REGISTRY
+        
+        # LRU cache of LLM routing decisions keyed on the routing inputs
+        self._route_cache: OrderedDict[str, RoutingDecision] = OrderedDict()
+        # In-flight LLM routing calls keyed like the cache
+        self._pending_routes: dict[str, asyncio.Future[RoutingDecision]] = {}
+        
+        # How each decision was reached: heuristic / cache / llm / fallback
+        self.route_stats: Counter[str] = Counter()
+        
+        self._agent_semaphore = asyncio.Semaphore(MAX_CONCURRENT_AGENTS)
     
     async def route(self, context: EnhancementContext) -> RoutingDecision:
         """
@@ -190,6 +325,30 @@ class RouterAgent:
                 agent_prompts={},
             )
         
+        heuristic = self._try_heuristic(context)
+        if heuristic is not None:
+            return heuristic
+        
+        cache_key = self._route_cache_key(context)
+        cached = self._route_cache.get(cache_key)
+        if cached is not None:
+            self.route_stats["cache"] += 1
+            self._route_cache.move_to_end(cache_key)
+            return cached
+        
+        # Concurrent requests with the same routing inputs share one LLM call
+        pending = self._pending_routes.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._route_with_llm(context, cache_key))
+            self._pending_routes[cache_key] = pending
+            pending.add_done_callback(lambda _: self._pending_routes.pop(cache_key, None))
+        
+        # Shield so one caller being cancelled doesn't cancel the others
+        return await asyncio.shield(pending)
+    
+    async def _route_with_llm(self, context: EnhancementContext, cache_key: str) -> RoutingDecision:
+        """Ask the LLM for a routing decision and cache it."""
+        self.route_stats["llm"] += 1
         # Format signals for prompt
         signals_text = "\n".join([
             f"- [{s.severity.value.upper()}] {s.signal}"
@@ -197,31 +356,31 @@ class RouterAgent:
         ])
         
         # Format expression issues
+        expression = context.expression
         expression_issues_text = ""
-        if context.expression_issues:
-            expression_issues_text = "表情问题：\n" + "\n".join([
-                f"  - {issue}" for issue in context.expression_issues
+        if expression.issues:
+            expression_issues_text = "\n".join([
+                "表情问题：", *(f"  - {issue}" for issue in expression.issues)
             ])
         
-        # Determine expression mode
-        expression_mode = context.expression_mode if hasattr(context, 'expression_mode') else "preserve"
-        expression_type = context.expression_type if hasattr(context, 'expression_type') else "neutral"
-        expression_natural = context.expression_natural if hasattr(context, 'expression_natural') else True
-        
-        prompt = ROUTING_PROMPT.format(
+        user_message = ROUTING_USER_TEMPLATE.format(
             scene_type=context.scene_type,
             ai_likelihood=context.ai_likelihood,
             signals=signals_text,
-            expression_type=expression_type,
-            expression_natural="是" if expression_natural else "否",
-            expression_mode=expression_mode,
+            expression_type=expression.type,
+            expression_natural="是" if expression.natural else "否",
+            expression_mode=expression.mode.value,
             expression_issues=expression_issues_text,
         )
         
         try:
             response = await self.llm_client.chat_completion(
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2048,
+                messages=[
+                    {"role": "system", "content": ROUTING_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message},
+                ],
+                max_tokens=ROUTE_MAX_TOKENS,
+                response_format=ROUTE_RESPONSE_FORMAT,
             )
             
             result = await self.llm_client.parse_json_response(response)
@@ -229,22 +388,16 @@ class RouterAgent:
             # Parse agent types
             agents_to_invoke = []
             for agent_name in result.get("agents_to_invoke", []):
-                try:
-                    agent_type = AgentType(agent_name.lower())
-                    if agent_type in self.available_agents:
-                        agents_to_invoke.append(agent_type)
-                except ValueError:
-                    continue
+                agent_type = _AGENT_TYPE_BY_NAME.get(agent_name.lower())
+                if agent_type in self.available_agents:
+                    agents_to_invoke.append(agent_type)
             
             # Parse priority order
             priority_order = []
             for agent_name in result.get("priority_order", []):
-                try:
-                    agent_type = AgentType(agent_name.lower())
-                    if agent_type in agents_to_invoke:
-                        priority_order.append(agent_type)
-                except ValueError:
-                    continue
+                agent_type = _AGENT_TYPE_BY_NAME.get(agent_name.lower())
+                if agent_type in agents_to_invoke:
+                    priority_order.append(agent_type)
             
             # Ensure all invoked agents are in priority order
             for agent_type in agents_to_invoke:
@@ -256,26 +409,24 @@ class RouterAgent:
             raw_prompts = result.get("agent_prompts", {})
             
             for agent_name, prompt_data in raw_prompts.items():
-                try:
-                    agent_type = AgentType(agent_name.lower())
-                    if agent_type in agents_to_invoke:
-                        agent_prompts[agent_type] = AgentPrompt(
-                            agent_type=agent_type,
-                            positive_prompt=prompt_data.get("positive_prompt", ""),
-                            negative_prompt=prompt_data.get("negative_prompt", ""),
-                            intensity=prompt_data.get("intensity", "medium"),
-                            specific_instructions=prompt_data.get("specific_instructions", []),
-                            target_areas=prompt_data.get("target_areas", []),
-                            # New fields
-                            preservation_prompt=prompt_data.get("preservation_prompt", ""),
-                            correction_prompt=prompt_data.get("correction_prompt", ""),
-                            denoising_strength=prompt_data.get("denoising_strength", 0.2),
-                            expression_mode=prompt_data.get("expression_mode", expression_mode),
-                            expression_type=prompt_data.get("expression_type", expression_type),
-                            expression_issues=prompt_data.get("expression_issues", []),
-                        )
-                except (ValueError, KeyError):
+                agent_type = _AGENT_TYPE_BY_NAME.get(agent_name.lower())
+                if agent_type not in agents_to_invoke:
                     continue
+                agent_prompts[agent_type] = AgentPrompt(
+                    agent_type=agent_type,
+                    positive_prompt=prompt_data.get("positive_prompt", ""),
+                    negative_prompt=prompt_data.get("negative_prompt", ""),
+                    intensity=prompt_data.get("intensity", "medium"),
+                    specific_instructions=prompt_data.get("specific_instructions", []),
+                    target_areas=prompt_data.get("target_areas", []),
+                    # New fields
+                    preservation_prompt=prompt_data.get("preservation_prompt", ""),
+                    correction_prompt=prompt_data.get("correction_prompt", ""),
+                    denoising_strength=prompt_data.get("denoising_strength", 0.2),
+                    expression_mode=prompt_data.get("expression_mode", expression.mode),
+                    expression_type=prompt_data.get("expression_type", expression.type),
+                    expression_issues=prompt_data.get("expression_issues", []),
+                )
             
             # Generate default prompts for agents without specific prompts
             for agent_type in agents_to_invoke:
@@ -284,121 +435,77 @@ class RouterAgent:
                         agent_type, context
                     )
             
-            return RoutingDecision(
+            decision = RoutingDecision(
                 agents_to_invoke=agents_to_invoke,
                 reasoning=result.get("reasoning", ""),
                 priority_order=priority_order,
                 agent_prompts=agent_prompts,
             )
+            self._cache_decision(cache_key, decision)
+            return decision
             
         except Exception as e:
             # Fallback: use heuristic-based routing
             return await self._fallback_routing(context)
     
+    def _route_cache_key(self, context: EnhancementContext) -> str:
+        """
+        Build a stable cache key from the inputs the routing prompt depends on.
+        
+        Text is case- and whitespace-normalized and signals are sorted, so
+        detections that differ only in formatting or order share a key.
+        """
+        expression = context.expression
+        canonical = repr((
+            context.scene_type.strip().lower(),
+            round(context.ai_likelihood, 1),
+            sorted((s.severity.value, _normalize_text(s.signal)) for s in context.fake_signals),
+            expression.type,
+            expression.mode.value,
+            expression.natural,
+            tuple(_normalize_text(issue) for issue in expression.issues),
+        ))
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cache_decision(self, key: str, decision: RoutingDecision) -> None:
+        """Store a routing decision, evicting the least recently used entry."""
+        self._route_cache[key] = decision
+        self._route_cache.move_to_end(key)
+        if len(self._route_cache) > ROUTE_CACHE_SIZE:
+            self._route_cache.popitem(last=False)
+    
     def _generate_default_prompt(
         self,
         agent_type: AgentType,
         context: EnhancementContext,
     ) -> AgentPrompt:
         """Generate a default prompt for an agent type."""
-        # Get expression context
-        expression_mode = getattr(context, 'expression_mode', 'preserve')
-        expression_type = getattr(context, 'expression_type', 'neutral')
-        expression_issues = getattr(context, 'expression_issues', [])
-        
-        # Base preservation prompt
-        base_preservation = "maintain overall face shape and identity, preserve hair style"
-        if expression_mode == "preserve":
-            base_preservation += ", preserve exact facial expression"
-        
-        # Base negative addition for expression preservation
-        expression_negative = ""
-        if expression_mode == "preserve":
-            expression_negative = ", altered expression, different emotion, changed pose"
+        if agent_type is AgentType.EXPRESSION:
+            return self._generate_expression_prompt(context)
         
-        defaults = {
-            AgentType.SKIN: AgentPrompt(
-                agent_type=AgentType.SKIN,
-                positive_prompt="natural skin texture, visible pores, subtle imperfections, realistic skin detail",
-                negative_prompt="plastic skin, airbrushed, overly smooth, waxy, artificial" + expression_negative,
-                intensity="medium",
-                specific_instructions=["添加自然的皮肤纹理", "增加毛孔细节"],
-                target_areas=["face", "skin areas"],
-                preservation_prompt=base_preservation,
-                denoising_strength=0.18,
-                expression_mode=expression_mode,
-                expression_type=expression_type,
-            ),
-            AgentType.LIGHTING: AgentPrompt(
-                agent_type=AgentType.LIGHTING,
-                positive_prompt="natural lighting, consistent shadows, soft light falloff, realistic highlights",
-                negative_prompt="harsh lighting, inconsistent shadows, artificial highlights, flat lighting" + expression_negative,
-                intensity="medium",
-                specific_instructions=["统一光源方向", "柔化阴影边缘"],
-                target_areas=["global"],
-                preservation_prompt=base_preservation,
-                denoising_strength=0.18,
-                expression_mode=expression_mode,
-                expression_type=expression_type,
-            ),
-            AgentType.TEXTURE: AgentPrompt(
-                agent_type=AgentType.TEXTURE,
-                positive_prompt="detailed texture, natural surface variation, micro details, material authenticity",
-                negative_prompt="uniform texture, repetitive patterns, overly clean surfaces, artificial smoothness" + expression_negative,
-                intensity="medium",
-                specific_instructions=["增加表面细节", "添加自然磨损感"],
-                target_areas=["surfaces", "materials"],
-                preservation_prompt=base_preservation,
-                denoising_strength=0.18,
-                expression_mode=expression_mode,
-                expression_type=expression_type,
-            ),
-            AgentType.GEOMETRY: AgentPrompt(
-                agent_type=AgentType.GEOMETRY,
-                positive_prompt="correct anatomy, natural proportions, proper perspective, realistic pose",
-                negative_prompt="distorted anatomy, extra fingers, wrong proportions, impossible geometry" + expression_negative,
-                intensity="medium",
-                specific_instructions=["修正解剖学错误", "调整比例"],
-                target_areas=["body", "hands", "face"],
-                preservation_prompt=base_preservation,
-                denoising_strength=0.20,
-                expression_mode=expression_mode,
-                expression_type=expression_type,
-            ),
-            AgentType.COLOR: AgentPrompt(
-                agent_type=AgentType.COLOR,
-                positive_prompt="natural colors, balanced saturation, consistent color temperature, realistic tones",
-                negative_prompt="oversaturated, HDR look, artificial colors, inconsistent temperature" + expression_negative,
-                intensity="medium",
-                specific_instructions=["降低过度饱和", "统一色温"],
-                target_areas=["global"],
-                preservation_prompt=base_preservation,
-                denoising_strength=0.15,
-                expression_mode=expression_mode,
-                expression_type=expression_type,
-            ),
-            AgentType.EXPRESSION: self._generate_expression_prompt(context),
-        }
-        return defaults.get(agent_type, AgentPrompt(
-            agent_type=agent_type,
-            positive_prompt="realistic, natural",
-            negative_prompt="artificial, fake" + expression_negative,
-            intensity="medium",
-            specific_instructions=[],
-            target_areas=[],
-            preservation_prompt=base_preservation,
-            denoising_strength=0.18,
-            expression_mode=expression_mode,
-            expression_type=expression_type,
-        ))
+        template = _DEFAULT_PROMPT_TEMPLATES[agent_type]
+        expression = context.expression
+        if expression.mode is ExpressionMode.PRESERVE:
+            return replace(
+                template,
+                negative_prompt=_EXPRESSION_PRESERVE_NEGATIVES[agent_type],
+                preservation_prompt=_EXPRESSION_PRESERVATION,
+                expression_mode=expression.mode,
+                expression_type=expression.type,
+            )
+        return replace(
+            template,
+            expression_mode=expression.mode,
+            expression_type=expression.type,
+        )
     
     def _generate_expression_prompt(self, context: EnhancementContext) -> AgentPrompt:
         """Generate a prompt specifically for expression correction."""
-        expression_type = getattr(context, 'expression_type', 'neutral')
-        expression_issues = getattr(context, 'expression_issues', [])
+        expression_type = context.expression.type
+        expression_issues = context.expression.issues
         
         # Get template from ExpressionAgent
-        template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type, {})
+        template = EXPRESSION_CORRECTION_TEMPLATES.get(expression_type)
         
         if template:
             return AgentPrompt(
@@ -411,7 +518,7 @@ class RouterAgent:
                 preservation_prompt=template.get("preservation", "maintain face shape and identity"),
                 correction_prompt=template.get("positive", ""),
                 denoising_strength=0.28,
-                expression_mode="correct",
+                expression_mode=ExpressionMode.CORRECT,
                 expression_type=expression_type,
                 expression_issues=expression_issues,
             )
@@ -426,7 +533,7 @@ class RouterAgent:
                 preservation_prompt="maintain face shape and identity",
                 correction_prompt="",
                 denoising_strength=0.25,
-                expression_mode="correct",
+                expression_mode=ExpressionMode.CORRECT,
                 expression_type=expression_type,
                 expression_issues=expression_issues,
             )
@@ -435,16 +542,48 @@ class RouterAgent:
         """
         Fallback routing using heuristics when LLM fails.
         """
-        agents_to_invoke = []
+        self.route_stats["fallback"] += 1
+        return self._heuristic_routing(
+            context, handled=classify(context),
+            reasoning="基于规则的路由决策（LLM调用失败时的后备方案）",
+        )
+    
+    def _try_heuristic(self, context: EnhancementContext) -> Optional[RoutingDecision]:
+        """
+        Route without the LLM when the keyword match is confident enough.
+        
+        Applies when at least one agent matches, the expression is preserved
+        and the image is only mildly AI-like; otherwise returns None.
+        """
+        if context.expression.mode is not ExpressionMode.PRESERVE:
+            return None
+        if context.ai_likelihood >= HEURISTIC_MAX_AI_LIKELIHOOD:
+            return None
         
-        for agent_type, agent in self.available_agents.items():
-            if await agent.can_handle(context):
-                agents_to_invoke.append(agent_type)
+        handled = classify(context)
+        if not handled:
+            return None
         
-        # Default priority order - EXPRESSION first if correction needed
-        expression_mode = getattr(context, 'expression_mode', 'preserve')
+        self.route_stats["heuristic"] += 1
+        return self._heuristic_routing(
+            context, handled=handled,
+            reasoning="基于关键词的快速路由决策（高置信度，跳过LLM）",
+        )
+    
+    def _heuristic_routing(
+        self,
+        context: EnhancementContext,
+        handled: set[AgentType],
+        reasoning: str,
+    ) -> RoutingDecision:
+        """Build a decision with default prompts for the agents in ``handled``."""
+        agents_to_invoke = [
+            agent_type for agent_type in self.available_agents
+            if agent_type in handled
+        ]
         
-        if expression_mode == "correct":
+        # Default priority order - EXPRESSION first if correction needed
+        if context.expression.mode is ExpressionMode.CORRECT:
             priority_order = [
                 AgentType.EXPRESSION,  # Expression correction first
                 AgentType.GEOMETRY,
@@ -472,11 +611,80 @@ class RouterAgent:
         
         return RoutingDecision(
             agents_to_invoke=agents_to_invoke,
-            reasoning="基于规则的路由决策（LLM调用失败时的后备方案）",
+            reasoning=reasoning,
             priority_order=priority_order,
             agent_prompts=agent_prompts,
         )
     
+    async def execute_plan(
+        self,
+        decision: RoutingDecision,
+        context: EnhancementContext,
+        prompts_by_agent: Optional[dict[AgentType, Optional[AgentPrompt]]] = None,
+    ) -> tuple[list[AgentResult], str]:
+        """
+        Run the decision's agents level by level.
+        
+        Agents in the same level run concurrently on the same input image;
+        the highest-priority successful output of a level feeds the next,
+        and the level's other successful results are marked superseded.
+        
+        Args:
+            decision: Routing decision to execute
+            context: Context for this round; it is not mutated
+            prompts_by_agent: Pre-resolved prompt per agent, if available
+            
+        Returns:
+            Tuple of (agent results in execution order, resulting image)
+        """
+        if prompts_by_agent is None:
+            prompts_by_agent = {a: decision.get_prompt(a) for a in decision.priority_order}
+        
+        results = []
+        image = context.image_base64
+        
+        for level in decision.execution_levels():
+            level = [a for a in level if a in self.available_agents]
+            if not level:
+                continue
+            
+            level_results = await asyncio.gather(*[
+                self._run_agent(agent_type, context, image, prompts_by_agent.get(agent_type))
+                for agent_type in level
+            ])
+            
+            # Outputs within a level can't be stacked; keep the highest-priority
+            # successful image and mark the others' edits as not applied
+            winner = None
+            for result in level_results:
+                if not (result.success and result.enhanced_image_base64):
+                    results.append(result)
+                elif winner is None:
+                    winner = result.agent_type
+                    image = result.enhanced_image_base64
+                    results.append(result)
+                else:
+                    results.append(result.superseded_by(winner))
+        
+        return results, image
+    
+    async def _run_agent(
+        self,
+        agent_type: AgentType,
+        context: EnhancementContext,
+        image_base64: str,
+        agent_prompt: Optional[AgentPrompt],
+    ) -> AgentResult:
+        """Run one expert on its own copy of the context."""
+        agent = self.available_agents[agent_type]
+        agent_context = replace(context, image_base64=image_base64, agent_prompt=agent_prompt)
+        
+        async with self._agent_semaphore:
+            try:
+                return await agent.enhance(agent_context)
+            except Exception as e:
+                return AgentResult.fail(agent_type, "专家执行失败", str(e))
+    
     def get_agent(self, agent_type: AgentType) -> BaseEnhancementAgent:
         """Get an agent instance by type."""
         return self.available_agents.get(agent_type)
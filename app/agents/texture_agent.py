@@ -1,7 +1,6 @@
 """Texture Enhancement Agent - Specializes in fixing texture-related AI artifacts."""
 
-from app.agents.base import BaseEnhancementAgent, EnhancementContext, AgentResult, AgentType
-from app.services.llm_client import get_llm_client
+from app.agents.base import BaseEnhancementAgent, EnhancementContext, AgentResult, AgentType, INTENSITY_ZH
 
 
 class TextureEnhancementAgent(BaseEnhancementAgent):
@@ -17,59 +16,39 @@ class TextureEnhancementAgent(BaseEnhancementAgent):
     """
     
     agent_type = AgentType.TEXTURE
+    __slots__ = ()
     
     # Keywords that indicate texture-related issues
-    TEXTURE_KEYWORDS = [
+    KEYWORDS = [
         "texture", "纹理", "uniform", "均匀", "pattern", "图案",
         "detail", "细节", "surface", "表面", "material", "材质",
         "clean", "干净", "smooth", "平滑", "repetit", "重复",
         "micro", "微观", "grain", "颗粒"
     ]
     
-    def __init__(self):
-        self.llm_client = get_llm_client()
-    
-    async def can_handle(self, context: EnhancementContext) -> bool:
-        """Check if there are texture-related issues to fix."""
-        relevant_signals = self._find_relevant_signals(context, self.TEXTURE_KEYWORDS)
-        return len(relevant_signals) > 0
-    
     async def enhance(self, context: EnhancementContext) -> AgentResult:
         """Execute texture enhancement based on the provided prompt."""
+        agent_type = self.agent_type
+        prompt_dict = self._get_prompt_dict(context)
+        
         try:
             prompt = context.agent_prompt
-            prompt_dict = self._get_prompt_dict(context)
             
             if prompt:
-                changes_made = prompt.specific_instructions.copy()
+                changes_made = prompt.specific_instructions
                 
-                intensity_desc = {
-                    "light": "轻微",
-                    "medium": "中等",
-                    "strong": "较强"
-                }.get(prompt.intensity, "中等")
+                intensity_desc = INTENSITY_ZH.get(prompt.intensity, "中等")
                 
-                description = f"纹理优化 ({intensity_desc}强度) - 目标区域: {', '.join(prompt.target_areas) if prompt.target_areas else '全局'}"
+                description = f"纹理优化 ({intensity_desc}强度) - 目标区域: {prompt.target_areas_text}"
             else:
                 changes_made = ["增加表面细节", "添加自然磨损感"]
                 description = "纹理优化 - 使用默认设置"
             
-            return AgentResult(
-                success=True,
-                agent_type=self.agent_type,
-                enhanced_image_base64=context.image_base64,
-                description=description,
-                changes_made=changes_made,
-                error_message=None,
-                prompt_used=prompt_dict,
-            )
+            return AgentResult.ok(agent_type, description, changes_made, prompt_dict)
             
         except Exception as e:
-            return AgentResult(
-                success=False,
-                agent_type=self.agent_type,
-                enhanced_image_base64=context.image_base64,
-                description="纹理优化失败",
-                error_message=str(e),
-                prompt_used=self._get_prompt_dict(context),
-            )
+            return AgentResult.fail(agent_type, "纹理优化失败", str(e), prompt_dict)
+
+
+# Agents are stateless, so one shared instance serves every request
+texture_enhancement_agent = TextureEnhancementAgent()
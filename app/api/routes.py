@@ -1,19 +1,28 @@
 """API routes for the image realism enhancement service."""
 
-import base64
+import asyncio
+import binascii
+import hashlib
+import logging
+import mmap
 import uuid
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Dict
+from typing import BinaryIO, Optional
 
-import aiofiles
-from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 import time
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse
 from PIL import Image
-import io
 
-from app.config import get_settings
+try:
+    # SIMD-accelerated drop-in for the stdlib module; same API and exceptions
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+from app.config import settings
 from app.models.schemas import (
     UploadResponse,
     JobResponse,
@@ -23,18 +32,212 @@ from app.models.schemas import (
 from app.pipeline.orchestrator import get_orchestrator
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# In-memory job storage (use Redis/DB in production), oldest first
+jobs: "OrderedDict[str, dict]" = OrderedDict()
+MAX_JOBS = 1024  # Oldest jobs are evicted beyond this
+JOB_SWEEP_INTERVAL = 60  # Seconds between sweeps for expired jobs
 
-# In-memory job storage (use Redis/DB in production)
-jobs: Dict[str, dict] = {}
+# Pipeline results of identical uploads, keyed by (content digest, mode), oldest first
+_result_cache: "OrderedDict[tuple[str, str], PipelineResult]" = OrderedDict()
+RESULT_CACHE_SIZE = 32  # Each entry may hold a full enhanced image
 
 # Simple in-memory event log for optional frontend tracking
-event_logs: list[dict] = []
+MAX_EVENT_LOGS = 10_000  # Oldest events are dropped beyond this
+event_logs: deque[dict] = deque(maxlen=MAX_EVENT_LOGS)
 
 class EventLog(BaseModel):
     event: str
     data: dict | None = None
 
-settings = get_settings()
+
+# Upload limits are fixed for the process lifetime, so resolve them once
+MAX_IMAGE_SIZE = settings.max_image_size
+FILE_TOO_LARGE_DETAIL = f"File too large. Maximum size is {MAX_IMAGE_SIZE // 1024 // 1024}MB."
+INVALID_FILE_TYPE_DETAIL = "Invalid file type. Please upload an image."
+INVALID_IMAGE_DETAIL = "Invalid image file."
+
+# Request bodies past this can't hold an acceptable image, multipart framing included
+MAX_REQUEST_BODY = MAX_IMAGE_SIZE + 64 * 1024
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per step while receiving an upload
+# Bytes hashed and encoded per step of _ingest; a multiple of 3, so the base64
+# of consecutive chunks joins without padding in between
+INGEST_CHUNK_SIZE = 3 * 16 * 1024
+IMAGE_HEADER_SIZE = 32  # Enough leading bytes to identify every sniffed format
+
+
+def _sniff_image_format(header: bytes) -> Optional[str]:
+    """Identify an enhanced image's file type from its magic bytes, without decoding it."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header.startswith(b"BM"):
+        return "bmp"
+    return None
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=FILE_TOO_LARGE_DETAIL)
+
+
+def _verify_image(src: BinaryIO) -> bool:
+    """Check that a file is an intact image Pillow can read, leaving it rewound."""
+    try:
+        with Image.open(src) as img:
+            img.verify()
+    except Exception:
+        return False
+    finally:
+        src.seek(0)
+    return True
+
+
+def _save_upload(src: BinaryIO, file_path: Path, max_size: int) -> Optional[str]:
+    """
+    Copy an upload to disk in chunks, hashing it on the way.
+    
+    Returns the content digest, or None (and removes the file) if the
+    upload exceeds max_size.
+    """
+    size = 0
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "wb") as dst:
+        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+    if size > max_size:
+        file_path.unlink(missing_ok=True)
+        return None
+    return digest.hexdigest()
+
+
+async def validated_upload(file: UploadFile = File(...)) -> UploadFile:
+    """Dependency: accept an upload only if it is declared as and verified to be an image."""
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail=INVALID_FILE_TYPE_DETAIL)
+    if file.size is not None and file.size > MAX_IMAGE_SIZE:
+        raise _file_too_large()
+
+    # verify() walks the whole file, so keep it off the event loop
+    if not await asyncio.to_thread(_verify_image, file.file):
+        raise HTTPException(status_code=400, detail=INVALID_IMAGE_DETAIL)
+
+    return file
+
+
+async def validated_image(file: UploadFile = Depends(validated_upload)) -> bytearray:
+    """Dependency: read a validated upload in chunks, rejecting it as soon as it exceeds the size limit."""
+    # Appended in place; unlike collecting chunks and joining, no second full-size copy
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if len(content) + len(chunk) > MAX_IMAGE_SIZE:
+            raise _file_too_large()
+        content += chunk
+    return content
+
+
+def _ingest(content: bytes | bytearray) -> tuple[str, str]:
+    """Digest and base64-encode image bytes in one pass over them; returns (digest, base64)."""
+    digest = hashlib.blake2b(digest_size=16)
+    encoded = []
+    view = memoryview(content)
+    # Each chunk is still in cache when the encoder reads it after the hasher
+    for start in range(0, len(view), INGEST_CHUNK_SIZE):
+        chunk = view[start:start + INGEST_CHUNK_SIZE]
+        digest.update(chunk)
+        encoded.append(base64.b64encode(chunk).decode("ascii"))
+    return digest.hexdigest(), "".join(encoded)
+
+
+async def encoded_image(content: bytearray = Depends(validated_image)) -> tuple[str, str]:
+    """Dependency: a validated upload as (content digest, base64), computed off the event loop."""
+    return await asyncio.to_thread(_ingest, content)
+
+
+def _encode_file(file_path: str) -> str:
+    """Base64-encode a file from a memory map, without reading it into a bytes copy first."""
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return base64.b64encode(mapped).decode("ascii")
+
+
+def _cached_result(digest: str, mode: str) -> Optional[PipelineResult]:
+    """Look up a previous pipeline result for the same upload and mode."""
+    result = _result_cache.get((digest, mode))
+    if result is not None:
+        _result_cache.move_to_end((digest, mode))
+    return result
+
+
+def _cache_result(digest: str, mode: str, result: PipelineResult) -> None:
+    """Remember a pipeline result, unless its enhancement failed and may succeed on retry."""
+    if result.enhancement_result is not None and not result.enhancement_result.success:
+        return
+    _result_cache[(digest, mode)] = result
+    _result_cache.move_to_end((digest, mode))
+    if len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+def _save_enhanced_image(result: PipelineResult, stem: Path) -> Optional[str]:
+    """Decode a result's enhanced image to disk; returns its path, or None if there is none."""
+    enhancement = result.enhancement_result
+    if enhancement is None or not enhancement.enhanced_image_base64:
+        return None
+
+    try:
+        content = base64.b64decode(enhancement.enhanced_image_base64)
+    except binascii.Error:
+        # Keep the job usable through the JSON result even if the payload is malformed
+        return None
+    image_format = _sniff_image_format(content[:IMAGE_HEADER_SIZE]) or "jpeg"
+    file_path = stem.with_suffix(f".{image_format}")
+    file_path.write_bytes(content)
+    return str(file_path)
+
+
+def _remove_job_files(job: dict) -> None:
+    """Delete a job's upload and enhanced image from disk."""
+    for key in ("file_path", "enhanced_path"):
+        if job.get(key):
+            Path(job[key]).unlink(missing_ok=True)
+
+
+def _store_job(job_id: str, job: dict) -> None:
+    """Add a job, evicting the oldest ones (and their files) beyond MAX_JOBS."""
+    job["created_at"] = time.monotonic()
+    jobs[job_id] = job
+    jobs.move_to_end(job_id)
+    while len(jobs) > MAX_JOBS:
+        _, evicted = jobs.popitem(last=False)
+        _remove_job_files(evicted)
+
+
+def _pop_expired_jobs(cutoff: float) -> list[dict]:
+    """Remove and return idle jobs: finished before cutoff, or uploaded before it and never processed."""
+    expired = [
+        job_id for job_id, job in jobs.items()
+        if job["status"] != JobStatus.PROCESSING
+        and job.get("finished_at", job["created_at"]) < cutoff
+    ]
+    return [jobs.pop(job_id) for job_id in expired]
+
+
+async def sweep_expired_jobs() -> None:
+    """Periodically drop jobs that have sat idle for longer than settings.job_ttl."""
+    while True:
+        await asyncio.sleep(JOB_SWEEP_INTERVAL)
+        for job in _pop_expired_jobs(time.monotonic() - settings.job_ttl):
+            await asyncio.to_thread(_remove_job_files, job)
 
 
 @router.get("/health")
@@ -44,39 +247,26 @@ async def health_check():
 
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(file: UploadFile = Depends(validated_upload)):
     """Upload an image for processing."""
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload an image.")
-
-    content = await file.read()
 
-    if len(content) > settings.max_image_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {settings.max_image_size // 1024 // 1024}MB."
-        )
-
-    try:
-        img = Image.open(io.BytesIO(content))
-        img.verify()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file.")
-
-    job_id = str(uuid.uuid4())
+    job_id = uuid.uuid4().hex
     storage_path = Path(settings.storage_path)
     storage_path.mkdir(parents=True, exist_ok=True)
 
+    # Stream straight to disk so the upload is never held in memory whole
     file_path = storage_path / f"{job_id}.jpg"
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
+    digest = await asyncio.to_thread(_save_upload, file.file, file_path, MAX_IMAGE_SIZE)
+    if digest is None:
+        raise _file_too_large()
 
-    jobs[job_id] = {
+    _store_job(job_id, {
         "status": JobStatus.PENDING,
         "file_path": str(file_path),
+        "digest": digest,
         "result": None,
         "error": None,
-    }
+    })
 
     return UploadResponse(job_id=job_id, message="Image uploaded successfully")
 
@@ -89,6 +279,8 @@ async def process_image(job_id: str, background_tasks: BackgroundTasks):
 
     job = jobs[job_id]
 
+    # The check-and-set below must not await: on the single event loop that is
+    # what keeps concurrent calls from scheduling the same job twice
     if job["status"] == JobStatus.PROCESSING:
         return JobResponse(job_id=job_id, status=JobStatus.PROCESSING, result=None, error=None)
 
@@ -106,13 +298,23 @@ async def run_pipeline(job_id: str):
     job = jobs[job_id]
 
     try:
-        async with aiofiles.open(job["file_path"], "rb") as f:
-            image_data = await f.read()
-
-        image_base64 = base64.b64encode(image_data).decode("utf-8")
-
-        orchestrator = get_orchestrator()
-        result = await orchestrator.process(image_base64)
+        # Jobs run the same flow as /enhance, so they share its cache entries
+        result = _cached_result(job["digest"], "enhance")
+        if result is None:
+            image_base64 = await asyncio.to_thread(_encode_file, job["file_path"])
+
+            orchestrator = get_orchestrator()
+            result = await orchestrator.process(image_base64)
+            _cache_result(job["digest"], "enhance", result)
+
+        try:
+            job["enhanced_path"] = await asyncio.to_thread(
+                _save_enhanced_image, result, Path(job["file_path"]).with_name(f"{job_id}_enhanced")
+            )
+        except OSError:
+            # The JSON result still carries the image; only GET /image is unavailable
+            logger.exception("Could not save enhanced image for job %s", job_id)
+            job["enhanced_path"] = None
 
         job["status"] = JobStatus.COMPLETED
         job["result"] = result
@@ -121,6 +323,11 @@ async def run_pipeline(job_id: str):
         job["status"] = JobStatus.FAILED
         job["error"] = str(e)
 
+    job["finished_at"] = time.monotonic()
+    if jobs.get(job_id) is not job:
+        # Evicted while running, so nothing else will clean up after it
+        _remove_job_files(job)
+
 
 @router.get("/result/{job_id}", response_model=JobResponse)
 async def get_result(job_id: str):
@@ -132,59 +339,47 @@ async def get_result(job_id: str):
     return JobResponse(job_id=job_id, status=job["status"], result=job["result"], error=job["error"])
 
 
-@router.post("/analyze")
-async def analyze_image_only(file: UploadFile = File(...)):
-    """Analyze an image without enhancement."""
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload an image.")
+@router.get("/image/{job_id}")
+async def get_enhanced_image(job_id: str):
+    """Get a completed job's enhanced image as binary rather than base64 in JSON."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    content = await file.read()
+    enhanced_path = jobs[job_id].get("enhanced_path")
+    if enhanced_path is None:
+        raise HTTPException(status_code=404, detail="Enhanced image not available")
 
-    if len(content) > settings.max_image_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {settings.max_image_size // 1024 // 1024}MB."
-        )
+    # Served with sendfile; a job's result never changes once completed
+    return FileResponse(enhanced_path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
 
-    try:
-        img = Image.open(io.BytesIO(content))
-        img.verify()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file.")
 
-    image_base64 = base64.b64encode(content).decode("utf-8")
+@router.post("/analyze", response_model=PipelineResult)
+async def analyze_image_only(image: tuple[str, str] = Depends(encoded_image)):
+    """Analyze an image without enhancement."""
+    digest, image_base64 = image
+    result = _cached_result(digest, "analyze")
+    if result is not None:
+        return result
 
     orchestrator = get_orchestrator()
     result = await orchestrator.analyze_only(image_base64)
+    _cache_result(digest, "analyze", result)
 
     return result
 
 
-@router.post("/enhance")
-async def enhance_image(file: UploadFile = File(...)):
+@router.post("/enhance", response_model=PipelineResult)
+async def enhance_image(image: tuple[str, str] = Depends(encoded_image)):
     """Analyze and enhance an image using the expert agent system."""
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload an image.")
-
-    content = await file.read()
-
-    if len(content) > settings.max_image_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {settings.max_image_size // 1024 // 1024}MB."
-        )
-
-    try:
-        img = Image.open(io.BytesIO(content))
-        img.verify()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file.")
-
-    image_base64 = base64.b64encode(content).decode("utf-8")
+    digest, image_base64 = image
+    result = _cached_result(digest, "enhance")
+    if result is not None:
+        return result
 
     orchestrator = get_orchestrator()
     # Simplify path: do not use expert system routing for now; directly run simplified enhancement
     result = await orchestrator.process(image_base64, enhance_image=True, use_expert_system=False)
+    _cache_result(digest, "enhance", result)
 
     return result
 
@@ -196,7 +391,7 @@ async def track_event(event: EventLog):
         event_logs.append({
             "event": event.event,
             "data": event.data or {},
-            "ts": time.time(),
+            "ts": time.time_ns(),  # Wall-clock nanoseconds, kept as an int
         })
     except Exception:
         pass
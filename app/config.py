@@ -1,7 +1,6 @@
 """Application configuration using Pydantic settings."""
 
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -29,13 +28,16 @@ class Settings(BaseSettings):
     # Application Settings
     max_image_size: int = 10485760  # 10MB
     storage_path: str = "./storage"
+    job_ttl: int = 3600  # Seconds a finished job is kept in memory
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # Read once at import and never changed afterwards
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", frozen=True)
+
+
+# Process-wide settings, loaded once at import
+settings = Settings()
 
 
-@lru_cache
 def get_settings() -> Settings:
-    """Get cached settings instance."""
-    return Settings()
+    """Get the settings instance (kept for callers that prefer a function)."""
+    return settings
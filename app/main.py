@@ -1,16 +1,23 @@
 """FastAPI application entry point."""
 
+import asyncio
+import gzip
+import hashlib
+import logging
 import os
 from pathlib import Path
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.api.routes import router
-from app.config import get_settings
+from app.api.routes import FILE_TOO_LARGE_DETAIL, MAX_REQUEST_BODY, router, sweep_expired_jobs
+from app.config import settings
+from app.pipeline.orchestrator import get_orchestrator
 
-settings = get_settings()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Image Realism Enhancement Engine",
@@ -18,6 +25,38 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Registered before CORS so its 413 responses still get CORS headers
+@app.middleware("http")
+async def reject_oversized_bodies(request: Request, call_next):
+    """Reject bodies declared too large before they are received and parsed."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BODY:
+        return JSONResponse(status_code=413, content={"detail": FILE_TOO_LARGE_DETAIL})
+    return await call_next(request)
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes responses under excluded path prefixes through untouched."""
+
+    def __init__(self, app: ASGIApp, exclude_prefixes: tuple[str, ...] = (), **options) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, **options)
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+# Compress JSON responses; base64 image payloads shrink by about a quarter.
+# Level 1 gets nearly all of that (it's mostly entropy coding) at a fraction
+# of the CPU, which matters since compression runs on the event loop.
+# Enhanced images under /image/ are already compressed formats.
+app.add_middleware(SelectiveGZipMiddleware, exclude_prefixes=("/image/",), minimum_size=1024, compresslevel=1)
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,14 +73,31 @@ frontend_path = Path(__file__).parent.parent / "frontend" / "dist"
 if frontend_path.exists():
     app.mount("/assets", StaticFiles(directory=str(frontend_path / "assets")), name="assets")
 
+    index_path = frontend_path / "index.html"
+    if index_path.exists():
+        # index.html only changes on a rebuild, so encode it once per process
+        _INDEX_HTML = index_path.read_bytes()
+        _INDEX_GZIP = gzip.compress(_INDEX_HTML, 9)
+        _INDEX_ETAG = f'"{hashlib.md5(_INDEX_HTML).hexdigest()}"'
+        # Revalidate every time so a new build's asset hashes are picked up
+        _INDEX_HEADERS = {"ETag": _INDEX_ETAG, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    else:
+        _INDEX_HTML = None
+
     @app.get("/", response_class=HTMLResponse)
-    async def serve_frontend():
+    async def serve_frontend(request: Request):
         """Serve the React frontend."""
-        index_path = frontend_path / "index.html"
-        if index_path.exists():
-            with open(index_path, "r", encoding="utf-8") as f:
-                return f.read()
-        return HTMLResponse(content="<html><body><h1>Frontend not found</h1></body></html>")
+        if _INDEX_HTML is None:
+            return HTMLResponse(content="<html><body><h1>Frontend not found</h1></body></html>")
+        if request.headers.get("if-none-match") == _INDEX_ETAG:
+            return Response(status_code=304, headers=_INDEX_HEADERS)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(
+                content=_INDEX_GZIP,
+                media_type="text/html",
+                headers={**_INDEX_HEADERS, "Content-Encoding": "gzip"},
+            )
+        return Response(content=_INDEX_HTML, media_type="text/html", headers=_INDEX_HEADERS)
 
 # Include API routes (must be after frontend to not override static file handling)
 app.include_router(router)
@@ -49,10 +105,20 @@ app.include_router(router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize storage directory on startup."""
+    """Initialize storage, the pipeline and the expired-job sweeper."""
     os.makedirs(settings.storage_path, exist_ok=True)
+    # Build the pipeline and its API clients now rather than on the first request.
+    # A misconfigured client must not keep the app from starting; requests will
+    # report the error instead.
+    try:
+        get_orchestrator()
+    except Exception:
+        logger.exception("Could not initialize the pipeline at startup")
+    # Keep a reference so the sweeper task isn't garbage collected
+    app.state.job_sweeper = asyncio.create_task(sweep_expired_jobs())
 
 
 if __name__ == "__main__":
     import uvicorn
+    # loop="auto" (the default) picks uvloop when it is installed
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -2,7 +2,11 @@
 
 from enum import Enum
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Built once per request and only read afterwards; cached results are shared across requests
+_RESULT_MODEL_CONFIG = ConfigDict(frozen=True)
 
 
 class Severity(str, Enum):
@@ -170,6 +174,8 @@ class ModuleInstruction(BaseModel):
 
 class ExecutionPlan(BaseModel):
     """Output schema for Stage 5: Execution Planner."""
+    model_config = _RESULT_MODEL_CONFIG
+
     lighting_module: list[ModuleInstruction] = Field(
         default_factory=list,
         description="Instructions for the lighting enhancement module"
@@ -254,6 +260,8 @@ class ExpertAgentResult(BaseModel):
 
 class IterationResult(BaseModel):
     """Result of a single iteration in the enhancement loop."""
+    model_config = _RESULT_MODEL_CONFIG
+
     iteration: int = Field(..., description="Iteration number (1-based)")
     ai_likelihood_before: float = Field(..., description="AI likelihood before this iteration")
     ai_likelihood_after: float = Field(..., description="AI likelihood after this iteration")
@@ -265,6 +273,8 @@ class IterationResult(BaseModel):
 
 class ExpertEnhancementResult(BaseModel):
     """Result from the expert enhancement system."""
+    model_config = _RESULT_MODEL_CONFIG
+
     success: bool = Field(..., description="Whether enhancement succeeded")
     total_iterations: int = Field(..., description="Total number of iterations performed")
     initial_ai_likelihood: float = Field(..., description="AI likelihood before enhancement")
@@ -298,6 +308,8 @@ class EnhancementResult(BaseModel):
 # Final Pipeline Result with Enhanced Image
 class PipelineResult(BaseModel):
     """Final output combining all pipeline stages."""
+    model_config = _RESULT_MODEL_CONFIG
+
     scene_classification: SceneClassification
     dimension_signals: DimensionSignals = Field(default_factory=dict, description="Fake signals grouped by dimension")
     fake_signals: list[FakeSignal]
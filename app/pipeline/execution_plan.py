@@ -35,24 +35,15 @@ class ExecutionPlanner:
         Returns:
             ExecutionPlan with module-specific instructions
         """
-        lighting_instructions = []
-        texture_instructions = []
-        noise_instructions = []
+        instructions = {module: [] for module in ModuleType}
 
         for operation in strategy.operations:
-            instruction = self._create_instruction(operation)
-
-            if operation.module == ModuleType.LIGHTING:
-                lighting_instructions.append(instruction)
-            elif operation.module == ModuleType.TEXTURE:
-                texture_instructions.append(instruction)
-            elif operation.module == ModuleType.NOISE:
-                noise_instructions.append(instruction)
+            instructions[operation.module].append(self._create_instruction(operation))
 
         return ExecutionPlan(
-            lighting_module=lighting_instructions,
-            texture_module=texture_instructions,
-            noise_module=noise_instructions,
+            lighting_module=instructions[ModuleType.LIGHTING],
+            texture_module=instructions[ModuleType.TEXTURE],
+            noise_module=instructions[ModuleType.NOISE],
         )
 
     def _create_instruction(self, operation) -> ModuleInstruction:
@@ -65,16 +56,11 @@ class ExecutionPlanner:
         Returns:
             ModuleInstruction with action and parameters
         """
-        # Get base parameters from strength
-        params = STRENGTH_PARAMS.get(operation.strength, STRENGTH_PARAMS[Strength.LOW]).copy()
-
-        # Add module-specific parameters
-        if operation.module == ModuleType.LIGHTING:
-            params.update(self._get_lighting_params(operation))
-        elif operation.module == ModuleType.TEXTURE:
-            params.update(self._get_texture_params(operation))
-        elif operation.module == ModuleType.NOISE:
-            params.update(self._get_noise_params(operation))
+        # Base parameters from strength, overlaid with module-specific ones
+        params = {
+            **STRENGTH_PARAMS.get(operation.strength, STRENGTH_PARAMS[Strength.LOW]),
+            **_MODULE_PARAMS[operation.module](self, operation),
+        }
 
         # Determine target region
         target_region = None if operation.locality == Locality.GLOBAL else "auto_detect"
@@ -156,3 +142,11 @@ class ExecutionPlanner:
             params["pattern"] = "natural"
 
         return params
+
+
+# Module-specific parameter builders, dispatched by module type
+_MODULE_PARAMS = {
+    ModuleType.LIGHTING: ExecutionPlanner._get_lighting_params,
+    ModuleType.TEXTURE: ExecutionPlanner._get_texture_params,
+    ModuleType.NOISE: ExecutionPlanner._get_noise_params,
+}
@@ -14,6 +14,14 @@ IMPORTANT RULES:
 
 You must return ONLY valid JSON, no other text."""
 
+# Dimensions a signal may be tagged with; anything else is filed under "general"
+SIGNAL_DIMENSIONS = ("skin", "lighting", "texture", "geometry", "color")
+
+# Response token caps; the combined analysis answers both prompts at once
+DETECTION_MAX_TOKENS = 2048
+EXPRESSION_MAX_TOKENS = 1024
+FULL_ANALYSIS_MAX_TOKENS = DETECTION_MAX_TOKENS + EXPRESSION_MAX_TOKENS
+
 
 # Expression analysis result
 @dataclass
@@ -140,6 +148,38 @@ If no issues are detected, return an empty array.
 Return ONLY the JSON object, no explanations or markdown."""
 
 
+# Closing "JSON only" lines of the standalone prompts, which would contradict
+# the combined output format when they are embedded below
+_JSON_ONLY_LINES = (
+    "Return ONLY the JSON object, no explanations or markdown.",
+    "只返回JSON，不要其他内容。",
+)
+
+
+def _embeddable(prompt: str) -> str:
+    """Strip a standalone prompt's closing output instruction."""
+    return "\n".join(
+        line for line in prompt.splitlines() if line.strip() not in _JSON_ONLY_LINES
+    ).rstrip()
+
+
+FULL_ANALYSIS_PROMPT = f"""Perform the two analyses below on this image in a single pass.
+
+PART 1 - AI artifact detection:
+{_embeddable(DETECTION_PROMPT)}
+
+PART 2 - Facial expression analysis:
+{_embeddable(EXPRESSION_DETECTION_PROMPT)}
+
+Combine both results into ONE JSON object:
+{{
+  "fake_signals": [<signals exactly as specified in PART 1>],
+  "expression": {{<expression object exactly as specified in PART 2>}}
+}}
+
+Return ONLY the combined JSON object, no explanations or markdown."""
+
+
 class FakeSignalDetector:
     """Detects AI-generated artifacts and realism issues in images."""
 
@@ -162,12 +202,46 @@ class FakeSignalDetector:
             image_base64=image_base64,
             system_prompt=SYSTEM_PROMPT,
             temperature=0,
-            max_tokens=2048,
+            max_tokens=DETECTION_MAX_TOKENS,
         )
 
         # Parse the JSON response
         result = await self.llm_client.parse_json_response(response)
+        return self._parse_signals(result)
 
+    async def analyze_full(
+        self, image_base64: str
+    ) -> tuple[list[FakeSignal], ExpressionAnalysis]:
+        """
+        Detect fake signals and analyze facial expression with one vision call.
+
+        Args:
+            image_base64: Base64-encoded image data
+
+        Returns:
+            Tuple of (fake_signals, expression_analysis)
+        """
+        response = await self.llm_client.chat_completion_with_image(
+            prompt=FULL_ANALYSIS_PROMPT,
+            image_base64=image_base64,
+            system_prompt=SYSTEM_PROMPT,
+            temperature=0,
+            max_tokens=FULL_ANALYSIS_MAX_TOKENS,
+        )
+
+        result = await self.llm_client.parse_json_response(response)
+
+        expression = result.get("expression")
+        if isinstance(expression, dict):
+            expression_analysis = self._parse_expression(expression)
+        else:
+            expression_analysis = ExpressionAnalysis()
+
+        return self._parse_signals(result), expression_analysis
+
+    @staticmethod
+    def _parse_signals(result: dict) -> list[FakeSignal]:
+        """Build FakeSignal objects from a parsed detection response."""
         signals = []
         for item in result.get("fake_signals", []):
             severity_str = item.get("severity", "low").lower()
@@ -177,8 +251,7 @@ class FakeSignalDetector:
                 severity = Severity.LOW
 
             dimension = item.get("dimension", "general").lower()
-            valid_dimensions = ["skin", "lighting", "texture", "geometry", "color"]
-            if dimension not in valid_dimensions:
+            if dimension not in SIGNAL_DIMENSIONS:
                 dimension = "general"
 
             signals.append(FakeSignal(
@@ -199,21 +272,11 @@ class FakeSignalDetector:
         Returns:
             DimensionSignals with signals grouped by dimension
         """
-        result = DimensionSignals()
+        buckets = {dimension: [] for dimension in SIGNAL_DIMENSIONS}
+        general = buckets["general"] = []
         for signal in signals:
-            if signal.dimension == "skin":
-                result.skin.append(signal)
-            elif signal.dimension == "lighting":
-                result.lighting.append(signal)
-            elif signal.dimension == "texture":
-                result.texture.append(signal)
-            elif signal.dimension == "geometry":
-                result.geometry.append(signal)
-            elif signal.dimension == "color":
-                result.color.append(signal)
-            else:
-                result.general.append(signal)
-        return result
+            buckets.get(signal.dimension, general).append(signal)
+        return DimensionSignals(**buckets)
 
     async def detect_expression(self, image_base64: str) -> ExpressionAnalysis:
         """
@@ -231,43 +294,11 @@ class FakeSignalDetector:
                 image_base64=image_base64,
                 system_prompt=SYSTEM_PROMPT,
                 temperature=0,
-                max_tokens=1024,
+                max_tokens=EXPRESSION_MAX_TOKENS,
             )
             
             result = await self.llm_client.parse_json_response(response)
-            
-            # Check if there's a face
-            has_face = result.get("has_face", False)
-            if not has_face:
-                return ExpressionAnalysis(
-                    expression_type="neutral",
-                    expression_natural=True,
-                    expression_issues=[],
-                    muscle_problems=[],
-                    correction_needed=False,
-                )
-            
-            expression_type = result.get("expression_type", "neutral")
-            expression_natural = result.get("expression_natural", True)
-            expression_issues = result.get("expression_issues", [])
-            muscle_problems = result.get("muscle_problems", [])
-            
-            # Determine if correction is needed
-            # Correction is needed for intense expressions with issues
-            intense_expressions = ["big_laugh", "crying", "surprise", "anger"]
-            correction_needed = (
-                expression_type in intense_expressions
-                and not expression_natural
-                and len(expression_issues) > 0
-            )
-            
-            return ExpressionAnalysis(
-                expression_type=expression_type,
-                expression_natural=expression_natural,
-                expression_issues=expression_issues,
-                muscle_problems=muscle_problems,
-                correction_needed=correction_needed,
-            )
+            return self._parse_expression(result)
             
         except Exception as e:
             # Return default neutral analysis on error
@@ -279,6 +310,42 @@ class FakeSignalDetector:
                 correction_needed=False,
             )
     
+    @staticmethod
+    def _parse_expression(result: dict) -> ExpressionAnalysis:
+        """Build an ExpressionAnalysis from a parsed expression response."""
+        # Check if there's a face
+        has_face = result.get("has_face", False)
+        if not has_face:
+            return ExpressionAnalysis(
+                expression_type="neutral",
+                expression_natural=True,
+                expression_issues=[],
+                muscle_problems=[],
+                correction_needed=False,
+            )
+        
+        expression_type = result.get("expression_type", "neutral")
+        expression_natural = result.get("expression_natural", True)
+        expression_issues = result.get("expression_issues", [])
+        muscle_problems = result.get("muscle_problems", [])
+        
+        # Determine if correction is needed
+        # Correction is needed for intense expressions with issues
+        intense_expressions = ["big_laugh", "crying", "surprise", "anger"]
+        correction_needed = (
+            expression_type in intense_expressions
+            and not expression_natural
+            and len(expression_issues) > 0
+        )
+        
+        return ExpressionAnalysis(
+            expression_type=expression_type,
+            expression_natural=expression_natural,
+            expression_issues=expression_issues,
+            muscle_problems=muscle_problems,
+            correction_needed=correction_needed,
+        )
+    
     async def detect_with_expression(
         self, image_base64: str
     ) -> tuple[list[FakeSignal], ExpressionAnalysis]:
@@ -291,9 +358,13 @@ class FakeSignalDetector:
         Returns:
             Tuple of (fake_signals, expression_analysis)
         """
-        # Run both detections
-        signals = await self.detect(image_base64)
-        expression = await self.detect_expression(image_base64)
+        # Both analyses share a single vision call; if the combined answer is
+        # unusable, fall back to the separate calls
+        try:
+            signals, expression = await self.analyze_full(image_base64)
+        except Exception:
+            signals = await self.detect(image_base64)
+            expression = await self.detect_expression(image_base64)
         
         # If expression has issues, add them to fake signals
         if expression.correction_needed:
@@ -1,5 +1,6 @@
 """Pipeline Orchestrator - Coordinates all enhancement stages."""
 
+import asyncio
 from app.models.schemas import (
     PipelineResult,
     SceneClassification,
@@ -78,11 +79,12 @@ class PipelineOrchestrator:
         Returns:
             PipelineResult containing all stage outputs and enhanced image
         """
-        # Stage 1: Scene Classification
-        scene_classification = await self.scene_classifier.classify(image_base64)
-
-        # Stage 2: Fake Signal Detection with dimension categorization
-        fake_signals = await self.fake_detector.detect(image_base64)
+        # Stages 1-2: Scene Classification and Fake Signal Detection are
+        # independent reads of the same image, so run them concurrently
+        scene_classification, fake_signals = await asyncio.gather(
+            self.scene_classifier.classify(image_base64),
+            self.fake_detector.detect(image_base64),
+        )
         dimension_signals = self.fake_detector.categorize_by_dimension(fake_signals)
 
         # Stage 3: RAG - Retrieve Realism Constraints
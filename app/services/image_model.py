@@ -7,7 +7,7 @@ import uuid
 from typing import Optional, TYPE_CHECKING
 import httpx
 
-from app.config import get_settings
+from app.config import settings
 from app.models.schemas import ModelRouting, EnhancementResult
 
 # Try to import MHC SDK
@@ -27,8 +27,11 @@ class ImageModelClient:
 
     def __init__(self):
         """Initialize the image model client."""
-        settings = get_settings()
-        self.client = httpx.AsyncClient(timeout=120.0)
+        # Keep idle connections to the image API alive for reuse across jobs
+        self.client = httpx.AsyncClient(
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+        )
         # Store last nano/MHC raw results for debugging
         self._last_mhc: dict = {}
         
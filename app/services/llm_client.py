@@ -8,7 +8,7 @@ from typing import Optional
 import openai
 from openai import AsyncOpenAI
 
-from app.config import get_settings
+from app.config import settings
 
 
 class LLMClient:
@@ -16,7 +16,6 @@ class LLMClient:
 
     def __init__(self):
         """Initialize the LLM client with settings."""
-        settings = get_settings()
         self._api_key = (settings.llm_api_key or "").strip()
         # Basic local-dev fallback:
         # - If user hasn't set a real key yet, we enable a mock mode so the
@@ -0,0 +1,8 @@
+"""Test configuration: settings are read once at import, so set them up first."""
+
+import os
+import tempfile
+
+# The OpenAI client refuses to construct without a key; tests never reach the API
+os.environ.setdefault("LLM_API_KEY", "test-key")
+os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp(prefix="realism-test-"))
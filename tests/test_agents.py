@@ -0,0 +1,75 @@
+"""Tests for agent selection."""
+
+import pytest
+
+from app.agents import (
+    ColorEnhancementAgent,
+    ExpressionEnhancementAgent,
+    GeometryEnhancementAgent,
+    LightingEnhancementAgent,
+    SkinEnhancementAgent,
+    TextureEnhancementAgent,
+)
+from app.agents.base import AgentType, EnhancementContext, ExpressionMode, ExpressionState, classify
+from app.models.schemas import FakeSignal, Severity
+
+AGENT_CLASSES = (
+    SkinEnhancementAgent,
+    LightingEnhancementAgent,
+    TextureEnhancementAgent,
+    GeometryEnhancementAgent,
+    ColorEnhancementAgent,
+    ExpressionEnhancementAgent,
+)
+
+
+def _baseline_can_handle(agent_cls, context: EnhancementContext) -> bool:
+    """The per-agent can_handle checks as they were before classify() replaced them."""
+    scene = context.scene_type.lower()
+    signals = [signal.signal.lower() for signal in context.fake_signals]
+    matched = any(kw.lower() in signal for signal in signals for kw in agent_cls.KEYWORDS)
+
+    if agent_cls.agent_type in (AgentType.SKIN, AgentType.EXPRESSION):
+        if scene not in ["portrait", "street", "other"]:
+            return False
+    if agent_cls.agent_type is AgentType.GEOMETRY and scene in ["landscape"]:
+        return False
+    if agent_cls.agent_type is AgentType.EXPRESSION and context.expression.mode == "correct":
+        return True
+    return matched
+
+
+def _signal_sets() -> list[list[str]]:
+    # Every keyword on its own, embedded in a sentence and in upper case
+    sets = [
+        [f"The {kw.upper()} looks off"]
+        for agent_cls in AGENT_CLASSES
+        for kw in agent_cls.KEYWORDS
+    ]
+    sets += [
+        [],
+        ["nothing relevant here"],
+        ["waxy skin texture on the face", "harsh shadow falloff"],
+        ["oversaturated HDR tones", "stiff smile with no crow's feet", "extra finger"],
+    ]
+    return sets
+
+
+@pytest.mark.parametrize("scene_type", ["portrait", "Street", "landscape", "other", "food"])
+@pytest.mark.parametrize("mode", list(ExpressionMode))
+def test_classify_matches_baseline_can_handle(scene_type, mode):
+    for signals in _signal_sets():
+        context = EnhancementContext(
+            image_base64="",
+            scene_type=scene_type,
+            ai_likelihood=0.9,
+            fake_signals=[FakeSignal(signal=s, severity=Severity.HIGH) for s in signals],
+            expression=ExpressionState(mode=mode),
+        )
+        expected = {
+            agent_cls.agent_type
+            for agent_cls in AGENT_CLASSES
+            if _baseline_can_handle(agent_cls, context)
+        }
+
+        assert classify(context) == expected, signals
@@ -0,0 +1,120 @@
+"""Tests for the iterative enhancement orchestrator."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents.base import AgentResult, AgentType
+from app.agents.enhancement_orchestrator import EnhancementOrchestrator, IterationResult
+from app.agents.router import RoutingDecision
+from app.models.schemas import FakeSignal, Severity
+from app.pipeline.fake_detector import ExpressionAnalysis
+
+
+def test_summary_leaves_out_superseded_agents():
+    order = [AgentType.SKIN, AgentType.COLOR]
+    skin = AgentResult.ok(AgentType.SKIN, "edited", ["skin edit"], enhanced_image_base64="img")
+    color = AgentResult.ok(AgentType.COLOR, "edited", ["color edit"], enhanced_image_base64="img")
+    iteration = IterationResult(
+        iteration=1,
+        ai_likelihood_before=0.9,
+        ai_likelihood_after=0.5,
+        agents_invoked=order,
+        agent_results=[skin, color.superseded_by(AgentType.SKIN)],
+        fake_signals_before=[],
+        fake_signals_after=[],
+        routing_decision=RoutingDecision(agents_to_invoke=order, reasoning="", priority_order=order),
+    )
+
+    summary = EnhancementOrchestrator()._generate_summary([iteration], 0.9, 0.5, "max_iterations")
+
+    assert AgentType.SKIN.value in summary
+    assert AgentType.COLOR.value not in summary
+
+
+def _run(likelihoods: list[float]):
+    """Enhance with each round re-detected at the next likelihood in the list."""
+    orchestrator = EnhancementOrchestrator()
+    measured = iter(likelihoods[1:])
+    rounds = iter(range(1, len(likelihoods)))
+    order = [AgentType.SKIN]
+
+    async def route(context):
+        return RoutingDecision(agents_to_invoke=order, reasoning="", priority_order=order)
+
+    async def execute_plan(decision, context, prompts_by_agent=None):
+        return [], f"round-{next(rounds)}"
+
+    async def classify(image_base64):
+        return SimpleNamespace(ai_likelihood=next(measured))
+
+    async def detect(image_base64):
+        # Fresh signals each round, so the repeated-routing stop never applies
+        return [FakeSignal(signal=image_base64, severity=Severity.HIGH, dimension="skin")]
+
+    orchestrator.router.route = route
+    orchestrator.router.execute_plan = execute_plan
+    orchestrator.scene_classifier.classify = classify
+    orchestrator.fake_detector.detect = detect
+    return asyncio.run(orchestrator.enhance("src", "landscape", likelihoods[0], []))
+
+
+@pytest.mark.parametrize(
+    "likelihoods, iterations, stopped_reason, early_stop_reason",
+    [
+        # Gain 0.12 predicts 0.06 for the next round: keep going
+        ([0.9, 0.78, 0.66, 0.54], 3, "max_iterations", ""),
+        # Gain 0.08 clears the threshold but predicts only 0.04
+        ([0.9, 0.82], 1, "no_improvement", "predicted_low_improvement"),
+        # Predicts 0.06 after the first round; the second improves by 0.03 only
+        ([0.9, 0.78, 0.75], 2, "no_improvement", ""),
+        # A strong first round doesn't carry a weak second one
+        ([0.9, 0.6, 0.52], 2, "no_improvement", "predicted_low_improvement"),
+    ],
+)
+def test_early_stop_boundaries(likelihoods, iterations, stopped_reason, early_stop_reason):
+    result = _run(likelihoods)
+
+    assert result.total_iterations == iterations
+    assert result.stopped_reason == stopped_reason
+    assert result.early_stop_reason == early_stop_reason
+
+
+@pytest.mark.parametrize("correction_needed, analyze_full_calls", [(True, 1), (False, 0)])
+def test_expression_rechecked_only_when_it_needed_correcting(correction_needed, analyze_full_calls):
+    orchestrator = EnhancementOrchestrator()
+    order = [AgentType.EXPRESSION]
+    calls = []
+
+    async def route(context):
+        return RoutingDecision(agents_to_invoke=order, reasoning="", priority_order=order)
+
+    async def execute_plan(decision, context, prompts_by_agent=None):
+        result = AgentResult.ok(AgentType.EXPRESSION, "edited", [], enhanced_image_base64="edited")
+        return [result], "edited"
+
+    async def classify(image_base64):
+        return SimpleNamespace(ai_likelihood=0.2)
+
+    async def detect(image_base64):
+        return []
+
+    async def analyze_full(image_base64):
+        calls.append(image_base64)
+        return [], ExpressionAnalysis()
+
+    orchestrator.router.route = route
+    orchestrator.router.execute_plan = execute_plan
+    orchestrator.scene_classifier.classify = classify
+    orchestrator.fake_detector.detect = detect
+    orchestrator.fake_detector.analyze_full = analyze_full
+    expression = ExpressionAnalysis(
+        expression_type="big_laugh",
+        expression_natural=not correction_needed,
+        correction_needed=correction_needed,
+    )
+    result = asyncio.run(orchestrator.enhance("src", "portrait", 0.9, [], expression))
+
+    assert result.final_ai_likelihood == 0.2
+    assert len(calls) == analyze_full_calls
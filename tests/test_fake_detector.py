@@ -0,0 +1,26 @@
+"""Tests for the fake signal detector."""
+
+import asyncio
+
+from app.pipeline.fake_detector import ExpressionAnalysis, FakeSignalDetector
+
+
+def test_detect_with_expression_falls_back_to_separate_calls(monkeypatch):
+    detector = FakeSignalDetector()
+
+    async def analyze_full(image_base64):
+        raise ValueError("truncated JSON")
+
+    async def detect(image_base64):
+        return []
+
+    async def detect_expression(image_base64):
+        return ExpressionAnalysis(expression_type="crying")
+
+    monkeypatch.setattr(detector, "analyze_full", analyze_full)
+    monkeypatch.setattr(detector, "detect", detect)
+    monkeypatch.setattr(detector, "detect_expression", detect_expression)
+    signals, expression = asyncio.run(detector.detect_with_expression("aW1hZ2U="))
+
+    assert signals == []
+    assert expression.expression_type == "crying"
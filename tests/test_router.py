@@ -0,0 +1,129 @@
+"""Tests for LLM routing and plan execution in the router agent."""
+
+import asyncio
+import json
+from dataclasses import replace
+
+from app.agents.base import AgentResult, AgentType, EnhancementContext
+from app.agents.router import ROUTE_MAX_TOKENS, RouterAgent, RoutingDecision
+from app.models.schemas import FakeSignal, Severity
+
+
+def _context() -> EnhancementContext:
+    return EnhancementContext(
+        image_base64="aW1hZ2U=",
+        scene_type="portrait",
+        ai_likelihood=0.9,
+        fake_signals=[
+            FakeSignal(signal="skin looks waxy", severity=Severity.HIGH, dimension="skin"),
+            FakeSignal(signal="hands have six fingers", severity=Severity.HIGH, dimension="geometry"),
+        ],
+    )
+
+
+def _full_plan() -> str:
+    """A routing plan that invokes every agent with a complete prompt."""
+    names = [agent_type.name for agent_type in AgentType]
+    prompt = {
+        "preservation_prompt": "maintain overall face shape and identity, preserve hair style",
+        "correction_prompt": "",
+        "positive_prompt": "add subtle skin pores, natural skin texture",
+        "negative_prompt": "plastic skin, airbrushed, altered expression",
+        "intensity": "light",
+        "denoising_strength": 0.15,
+        "expression_mode": "preserve",
+        "expression_type": "neutral",
+        "expression_issues": [],
+        "specific_instructions": ["添加轻微毛孔纹理"],
+        "target_areas": ["face"],
+    }
+    return json.dumps({
+        "agents_to_invoke": names,
+        "reasoning": "每个维度都检测到问题",
+        "priority_order": names,
+        "agent_prompts": {name: prompt for name in names},
+    }, ensure_ascii=False, indent=2)
+
+
+def _route_with_response(monkeypatch, response: str) -> tuple[RouterAgent, object, list[dict]]:
+    """Route through _route_with_llm with the LLM call replaced by a canned response."""
+    router = RouterAgent()
+    calls = []
+
+    async def chat_completion(**kwargs):
+        calls.append(kwargs)
+        return response
+
+    monkeypatch.setattr(router.llm_client, "chat_completion", chat_completion)
+    decision = asyncio.run(router._route_with_llm(_context(), "key"))
+    return router, decision, calls
+
+
+def test_full_plan_is_parsed(monkeypatch):
+    router, decision, calls = _route_with_response(monkeypatch, _full_plan())
+
+    assert calls[0]["max_tokens"] == ROUTE_MAX_TOKENS
+    assert decision.agents_to_invoke == list(AgentType)
+    assert set(decision.agent_prompts) == set(AgentType)
+    assert router.route_stats["fallback"] == 0
+    assert "key" in router._route_cache
+
+
+def test_truncated_plan_falls_back(monkeypatch):
+    plan = _full_plan()
+    router, decision, _ = _route_with_response(monkeypatch, plan[: len(plan) // 2])
+
+    assert router.route_stats["fallback"] == 1
+    assert decision.agents_to_invoke
+    assert "key" not in router._route_cache
+
+
+class _StubAgent:
+    """Appends its name to the image it was given, or fails if told to."""
+
+    def __init__(self, agent_type: AgentType, fail: bool = False):
+        self.agent_type = agent_type
+        self.fail = fail
+        self.inputs = []
+
+    async def enhance(self, context: EnhancementContext) -> AgentResult:
+        self.inputs.append(context.image_base64)
+        if self.fail:
+            return AgentResult.fail(self.agent_type, "failed", "stub failure")
+        return AgentResult.ok(
+            self.agent_type,
+            "edited",
+            [f"{self.agent_type.value} edit"],
+            enhanced_image_base64=f"{context.image_base64}+{self.agent_type.value}",
+        )
+
+
+def _execute(order: list[AgentType], failing: frozenset = frozenset()):
+    router = RouterAgent()
+    router.available_agents = {a: _StubAgent(a, fail=a in failing) for a in AgentType}
+    decision = RoutingDecision(agents_to_invoke=order, reasoning="", priority_order=order)
+    context = replace(_context(), image_base64="src")
+    results, image = asyncio.run(router.execute_plan(decision, context))
+    return router.available_agents, results, image
+
+
+def test_level_keeps_highest_priority_output():
+    order = [AgentType.EXPRESSION, AgentType.TEXTURE, AgentType.SKIN, AgentType.COLOR, AgentType.GEOMETRY]
+    agents, results, image = _execute(order)
+
+    # EXPRESSION, then [TEXTURE, SKIN, COLOR] on the same input, then GEOMETRY
+    assert [r.agent_type for r in results] == order
+    assert agents[AgentType.TEXTURE].inputs == agents[AgentType.COLOR].inputs == ["src+expression"]
+    assert image == "src+expression+texture+geometry"
+
+    superseded = [r for r in results if r.superseded]
+    assert [r.agent_type for r in superseded] == [AgentType.SKIN, AgentType.COLOR]
+    assert not any(r.success or r.enhanced_image_base64 or r.changes_made for r in superseded)
+
+
+def test_level_falls_through_failed_agents():
+    order = [AgentType.SKIN, AgentType.LIGHTING, AgentType.COLOR]
+    _, results, image = _execute(order, failing=frozenset({AgentType.SKIN}))
+
+    assert image == "src+lighting"
+    assert [r.agent_type for r in results if r.superseded] == [AgentType.COLOR]
@@ -0,0 +1,172 @@
+"""Tests for the HTTP routes."""
+
+import base64
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api import routes
+from app.main import app
+from app.models.schemas import (
+    AIConfidenceLevel,
+    DimensionSignals,
+    ExecutionPlan,
+    PipelineResult,
+    Priority,
+    RealismConstraints,
+    RealismScore,
+    SceneClassification,
+    Strategy,
+)
+
+client = TestClient(app)
+
+
+def _image_bytes(image_format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def _upload(content: bytes, content_type: str = "image/png"):
+    return client.post("/upload", files={"file": ("image", content, content_type)})
+
+
+@pytest.fixture(autouse=True)
+def _clean_state():
+    yield
+    for job in routes.jobs.values():
+        routes._remove_job_files(job)
+    routes.jobs.clear()
+    routes._result_cache.clear()
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "JPEG", "TIFF", "BMP"])
+def test_upload_accepts_readable_images(image_format):
+    response = _upload(_image_bytes(image_format))
+
+    assert response.status_code == 200
+    assert response.json()["job_id"] in routes.jobs
+
+
+def test_upload_rejects_truncated_image():
+    content = _image_bytes("PNG")
+    response = _upload(content[: len(content) - 20])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == routes.INVALID_IMAGE_DETAIL
+    assert not routes.jobs
+
+
+def test_upload_rejects_non_image_content():
+    response = _upload(b"BM but not a bitmap")
+
+    assert response.status_code == 400
+
+
+def test_sweep_expires_idle_jobs_but_not_running_ones():
+    unprocessed = _upload(_image_bytes("PNG")).json()["job_id"]
+    running = _upload(_image_bytes("PNG")).json()["job_id"]
+    routes.jobs[running]["status"] = routes.JobStatus.PROCESSING
+    unprocessed_path = routes.jobs[unprocessed]["file_path"]
+
+    assert routes._pop_expired_jobs(routes.jobs[unprocessed]["created_at"]) == []
+
+    expired = routes._pop_expired_jobs(float("inf"))
+
+    assert [job["file_path"] for job in expired] == [unprocessed_path]
+    assert list(routes.jobs) == [running]
+
+
+@pytest.mark.parametrize("size", [0, 1, routes.INGEST_CHUNK_SIZE, 2 * routes.INGEST_CHUNK_SIZE + 1])
+def test_ingest_matches_whole_buffer_encoding(size):
+    content = bytearray(i % 251 for i in range(size))
+
+    assert routes._ingest(content) == (
+        hashlib.blake2b(content, digest_size=16).hexdigest(),
+        base64.b64encode(content).decode("ascii"),
+    )
+
+
+def _pipeline_result() -> PipelineResult:
+    return PipelineResult(
+        scene_classification=SceneClassification(primary_scene="portrait", ai_likelihood=0.2),
+        dimension_signals=DimensionSignals(),
+        fake_signals=[],
+        realism_constraints=RealismConstraints(),
+        strategy=Strategy(goal="none", priority=Priority.VERY_LOW),
+        execution_plan=ExecutionPlan(),
+        realism_score=RealismScore(
+            before=0.8, after=0.8, ai_score_level=AIConfidenceLevel.LOW, confidence=0.9
+        ),
+    )
+
+
+class _CountingOrchestrator:
+    """Stands in for the pipeline, counting how often each flow runs."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def analyze_only(self, image_base64):
+        self.calls.append("analyze")
+        return _pipeline_result()
+
+    async def process(self, image_base64, **options):
+        self.calls.append("enhance")
+        return _pipeline_result()
+
+
+def test_result_cache_is_keyed_by_digest_and_mode(monkeypatch):
+    orchestrator = _CountingOrchestrator()
+    monkeypatch.setattr(routes, "get_orchestrator", lambda: orchestrator)
+    red = _image_bytes("PNG")
+    blue = io.BytesIO()
+    Image.new("RGB", (8, 8), "blue").save(blue, format="PNG")
+
+    def post(path, content):
+        response = client.post(path, files={"file": ("image", content, "image/png")})
+        assert response.status_code == 200
+        return response.json()
+
+    first = post("/analyze", red)
+    assert post("/analyze", red) == first
+    assert orchestrator.calls == ["analyze"]
+
+    # Same bytes in another mode, and other bytes in the same mode, both miss
+    post("/enhance", red)
+    post("/analyze", blue.getvalue())
+    assert orchestrator.calls == ["analyze", "enhance", "analyze"]
+
+
+def test_evicted_job_loses_its_upload(monkeypatch):
+    monkeypatch.setattr(routes, "MAX_JOBS", 1)
+    first = _upload(_image_bytes("PNG")).json()["job_id"]
+    first_path = Path(routes.jobs[first]["file_path"])
+    assert first_path.exists()
+
+    second = _upload(_image_bytes("PNG")).json()["job_id"]
+
+    assert list(routes.jobs) == [second]
+    assert not first_path.exists()
+    assert client.get(f"/result/{first}").status_code == 404
+
+
+def test_oversized_body_is_rejected_before_reading():
+    response = _upload(bytes(routes.MAX_REQUEST_BODY + 1))
+
+    assert response.status_code == 413
+    assert not routes.jobs
+
+
+def test_oversized_file_is_rejected():
+    # Fits under the request body cap, so the upload dependency is what rejects it
+    response = _upload(_image_bytes("PNG") + bytes(routes.MAX_IMAGE_SIZE))
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == routes.FILE_TOO_LARGE_DETAIL
+    assert not routes.jobs